@@ -0,0 +1,18 @@
+# Auteur : Rémy Wilson
+# Programme : Filtre unique qui garde les valeurs valides des zones, motifs et modes.
+# Date: 18 Octobre 2026
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from transod.filtering import filter_csv, print_report
+
+input_filename = "_TRANSOD2022.csv"
+output_filename = "_CLEANDATA_.csv"
+chunk_size = 1_000_000
+
+if __name__ == '__main__':
+    report = filter_csv(input_filename, output_filename, chunksize=chunk_size)
+    print_report(report)
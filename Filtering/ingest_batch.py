@@ -0,0 +1,18 @@
+# Auteur : Rémy Wilson
+# Programme : Ajoute de nouveaux lots bruts à l'état agrégé sans tout recalculer.
+# Date: 18 Octobre 2026
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from transod.incremental import update_state
+
+state_filename = "_AGREGATS_.npz"
+
+if __name__ == '__main__':
+    # Usage: python ingest_batch.py lot1.csv [lot2.csv ...]
+    state = update_state(state_filename, sys.argv[1:])
+    for entry in state['sources']:
+        print(f"{entry['source']}: {entry['rows_out']} lignes conservées sur {entry['rows_in']}")
@@ -0,0 +1,25 @@
+# Auteur : Rémy Wilson
+# Programme : Filtre et agrège plusieurs fichiers d'enquête en parallèle.
+# Date: 18 Octobre 2026
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from transod.batch import ingest_many
+from transod.incremental import save_state
+
+# Distinct from the incremental state of ingest_batch.py (_AGREGATS_.npz).
+combined_filename = "_AGREGATS_COMBINE_.npz"
+
+if __name__ == '__main__':
+    # Usage: python ingest_surveys.py "enquetes/*.csv" [autre.csv ...]
+    results = ingest_many(sys.argv[1:])
+
+    for survey, state in results['surveys'].items():
+        save_state(state, f"_AGREGATS_{survey}.npz")
+        rows = sum(entry['rows_out'] for entry in state['sources'])
+        print(f"{survey}: {rows} lignes conservées ({len(state['sources'])} fichier(s))")
+
+    save_state(results['combined'], combined_filename)
@@ -0,0 +1,18 @@
+# Auteur : Rémy Wilson
+# Programme : Validation en une passe du fichier brut, avec rapport et masque des lignes valides.
+# Date: 18 Octobre 2026
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from transod.validation import print_validation_report, validate_csv
+
+input_filename = "_TRANSOD2022.csv"
+mask_filename = "_MASQUE_VALIDE_.npy"
+chunk_size = 1_000_000
+
+if __name__ == '__main__':
+    mask, report = validate_csv(input_filename, chunksize=chunk_size, mask_path=mask_filename)
+    print_validation_report(report)
@@ -2,34 +2,55 @@
 # Programme : Création d'un test chi-carré avec résidus.
 # Date: 30 Décembre 2025
 
+import os
+import sys
+
 import pandas as pd
-import numpy as np
-from scipy.stats import chi2_contingency
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-df = pd.read_csv("_CLEANDATA_.csv")
-observed = pd.crosstab(df["originreportzone"], df["modeprimary"])
-chi2, p, dof, expected = chi2_contingency(observed)
-residuals = (observed - expected) / np.sqrt(expected)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from transod.contingency import chi2_batch
+from transod.cube import as_cube, crosstab
+from transod.incremental import load_data
+from transod.permutation import permutation_test
+from transod.render import show
+
+
+def compute_residuals(data):
+    cube = as_cube(data, ["origin", "mode"])
+    observed = crosstab(cube, "origin", "mode")
+    results = chi2_batch(observed.values)
+    residuals = pd.DataFrame(results['residuals'], index=observed.index, columns=observed.columns)
+    return observed, residuals, results
+
+
+def plot_residuals(residuals):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig = plt.figure(figsize=(15, 8))
+    ax = sns.heatmap(residuals, annot=True, fmt=".1f", cmap="coolwarm", center=0, annot_kws={'fontsize':14, 'fontweight':'bold'})
+    cbar = ax.collections[0].colorbar
+    cbar.set_label('Résidus Standarisés', fontsize=16, fontweight='bold')
 
-plt.figure(figsize=(15, 8))
-ax = sns.heatmap(residuals, annot=True, fmt=".1f", cmap="coolwarm", center=0, annot_kws={'fontsize':14, 'fontweight':'bold'})
-cbar = ax.collections[0].colorbar
-cbar.set_label('Résidus Standarisés', fontsize=16, fontweight='bold')
+    plt.title("Résidus standardisés du chi-carré : Secteur x Mode", fontsize=20, fontweight='bold', pad=15)
+    plt.xlabel("Mode", fontsize=16, fontweight='bold')
+    plt.ylabel("Secteur d'origine", fontsize=16, fontweight='bold')
+    plt.tight_layout()
+    return fig
 
-plt.title("Résidus standardisés du chi-carré : Secteur x Mode", fontsize=20, fontweight='bold', pad=15)
-plt.xlabel("Mode", fontsize=16, fontweight='bold')
-plt.ylabel("Secteur d'origine", fontsize=16, fontweight='bold')
-plt.tight_layout()
-plt.show()
 
-contingency = pd.crosstab(df["originreportzone"], df["modeprimary"])
+if __name__ == '__main__':
+    state_path = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1].endswith('.npz') else None
+    data = load_data("_CLEANDATA_.csv", state_path)
+    observed, residuals, results = compute_residuals(data)
+    show(plot_residuals(residuals))
 
-chi2, p, dof, expected = chi2_contingency(contingency)
+    cramers_v = results['cramers_v']
 
-n = contingency.values.sum()
-r, k = contingency.shape
-cramers_v = np.sqrt(chi2 / (n * (min(r-1, k-1))))
+    print(cramers_v)
 
-print(cramers_v)
\ No newline at end of file
+    # Many cells are sparse, so the asymptotic p-value is checked against a permutation test.
+    mc = permutation_test(observed.values, n_resamples=20000, seed=2022)
+    print(f"p (asymptotique): {mc['p_asymptotic']:.4g}")
+    print(f"p (Monte Carlo, {mc['n_resamples']} permutations): {mc['p_value']:.4g} ± {mc['p_se']:.2g}")
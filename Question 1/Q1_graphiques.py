@@ -2,64 +2,35 @@
 # Programme : Graphiques pour la première question de recherche
 # Date: 29 Décembre 2025
 
-import pandas as pd
-import matplotlib.pyplot as plt
-
-zones_dict = {
-    1: 'Ottawa Centre', 50: 'Ottawa Inner Area', 100: 'Ottawa East',
-    120: 'Beacon Hill', 140: 'Alta Vista', 180: 'Hunt Club',
-    200: 'Merivale', 240: 'Ottawa West', 260: 'Bayshore/Cedarview',
-    300: 'Orleans', 350: 'Rural East', 360: 'Rural Southeast',
-    400: 'South Gloucester/Letrim', 425: 'South Nepean', 450: 'Rural Southwest',
-    500: 'Kanata/Stittsville', 560: 'Rural West', 600: 'Île de Hull',
-    625: 'Hull Périphérie', 650: 'Plateau', 700: 'Aylmer',
-    750: 'Rural Northwest', 800: 'Gatineau Centre', 820: 'Gatineau Est',
-    840: 'Rural Northeast', 845: 'Masson-Angers'
-}
-
-sector_classification = {
-    'Centre-ville': [1, 50, 100, 240, 600, 800],
-    'Banlieue intérieure': [120, 140, 180, 200, 260, 625, 650, 700, 820],
-    'Banlieue extérieure': [300, 400, 425, 500, 350, 360, 450, 560, 750, 840, 845]
-}
-
-mode_categories = {
-    'Auto': [1, 2],
-    'Transport en commun': [3, 4, 5],
-    'Modes actifs': [6, 7, 14, 15],
-    'Autres': [8, 9, 10, 11, 13, 16, 18, 21, 22, 23, 24, 77]
-}
-
-
-def classify_sector(zone):
-    for sector, zones in sector_classification.items():
-        if zone in zones:
-            return sector
-    return 'Autre'
-
-
-def classify_mode(mode):
-    for category, modes in mode_categories.items():
-        if mode in modes:
-            return category
-    return 'Autres'
-
-
-def apply_classification(df, origin_col='originreportzone', mode_col='modeprimary', drop_autre=True):
-    df = df.copy()
-    df['origin_sector'] = df[origin_col].apply(classify_sector)
-    df['mode_category'] = df[mode_col].apply(classify_mode)
-    if drop_autre:
-        df = df[df['origin_sector'] != 'Autre']
-    return df
-
-
-def prepare_crosstab(df, origin_col='origin_sector', mode_col='mode_category',
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from transod.categories import mode_categories, sector_classification
+from transod.cube import as_cube, crosstab as cube_crosstab, rollup, weight_col
+from transod.incremental import load_data
+from transod.render import show
+
+
+def apply_classification(data, drop_autre=True, weights=None):
+    cube = as_cube(data, ['origin', 'mode'], weights=weights)
+
+    sectors = dict(sector_classification)
+    if not drop_autre:
+        classified = {zone for zones in sector_classification.values() for zone in zones}
+        sectors['Autre'] = [zone for zone in cube['labels']['origin'] if zone not in classified]
+
+    cube = rollup(cube, 'origin', sectors, name='origin_sector')
+    return rollup(cube, 'mode', mode_categories, name='mode_category')
+
+
+def prepare_crosstab(cube, origin_col='origin_sector', mode_col='mode_category',
                      sector_order=None, mode_order=None, normalize=True):
     sector_order = sector_order or ['Centre-ville', 'Banlieue intérieure', 'Banlieue extérieure']
     mode_order = mode_order or ['Auto', 'Transport en commun', 'Modes actifs', 'Autres']
 
-    crosstab = pd.crosstab(df[origin_col], df[mode_col], normalize='index' if normalize else None)
+    crosstab = cube_crosstab(cube, origin_col, mode_col, normalize='index' if normalize else False)
     if normalize:
         crosstab = crosstab * 100
 
@@ -70,6 +41,8 @@ def prepare_crosstab(df, origin_col='origin_sector', mode_col='mode_category',
 
 
 def plot_from_crosstab(crosstab_df, title=None, colors=None, figsize=(12, 7)):
+    import matplotlib.pyplot as plt
+
     colors = colors or {
         'Auto': '#ff6361',
         'Transport en commun': '#003f5c',
@@ -107,11 +80,12 @@ def plot_from_crosstab(crosstab_df, title=None, colors=None, figsize=(12, 7)):
     ax.set_ylim(0, 100)
 
     plt.tight_layout()
-    plt.show()
+    return fig
 
 if __name__ == '__main__':
-    df = pd.read_csv('_CLEANDATA_.csv')
+    state_path = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1].endswith('.npz') else None
+    data = load_data('_CLEANDATA_.csv', state_path)
 
-    df_classified = apply_classification(df)
-    crosstab = prepare_crosstab(df_classified)
-    plot_from_crosstab(crosstab)
\ No newline at end of file
+    cube = apply_classification(data, weights=weight_col)
+    crosstab = prepare_crosstab(cube)
+    show(plot_from_crosstab(crosstab))
\ No newline at end of file
@@ -2,101 +2,110 @@
 # Programme : Création d'un csv avec tableaux de contingence
 # Date: 31 Décembre 2025
 
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 
-sector_map = {
-    'Centre-ville': [1, 50, 100, 240, 600, 800],
-    'Banlieue intérieure': [120, 140, 180, 200, 260, 625, 650, 700, 820],
-    'Banlieue extérieure': [300, 400, 425, 500, 350, 360, 450, 560, 750, 840, 845]
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from transod.bootstrap import bootstrap_summary, summary_arrays
+from transod.categories import mode_categories, sector_classification
+from transod.cube import as_cube, crosstab, marginal, rollup, weight_col
+from transod.export import export_tables
+from transod.incremental import load_data
+from transod.memo import memoize
+
+sustainable_groups = {
+    'Auto/Autres': ['Auto', 'Autres'],
+    'Durable (TC+Actif)': ['Transport en commun', 'Modes actifs']
+}
+
+# Summary columns with a bootstrap interval, and the format used to display it.
+interval_columns = {
+    'Déplacements (n)': ('n', '{:.0f}'),
+    'Part dominante (%)': ('dominant_share', '{:.1f}'),
+    'TC + Actifs (%)': ('sustainable_share', '{:.1f}'),
+    'Ratio Auto/(TC+Actifs)': ('ratio', '{:.2f}'),
+    'Diversité modale': ('diversity', '{:.3f}'),
 }
 
-mode_map = {
-    'Auto': [1, 2],
-    'Transport en commun': [3, 4, 5],
-    'Modes actifs': [6, 7, 14, 15],
-    'Autres': [8, 9, 10, 11, 13, 16, 18, 21, 22, 23, 24, 77]
+sheet_titles = {
+    'frequencies': 'Fréquences',
+    'pct_by_sector': 'Pct par secteur',
+    'pct_by_mode': 'Pct par mode',
+    'pct_total': 'Pct total',
+    'sustainable': 'Modes durables',
+    'summary': 'Statistiques'
 }
 
-def classify_sector(code):
-    for sector, codes in sector_map.items():
-        if code in codes:
-            return sector
-    return 'Autre'
-
-def classify_mode(code):
-    for mode, codes in mode_map.items():
-        if code in codes:
-            return mode
-    return 'Autres'
-
-
-def create_comprehensive_table(df):
-    df = df.copy()
-    df['origin_sector'] = df['originreportzone'].apply(classify_sector)
-    df['mode_category'] = df['modeprimary'].apply(classify_mode)
-    df = df[df['origin_sector'] != 'Autre']
-
-    freq_table = pd.crosstab(
-        df['origin_sector'],
-        df['mode_category'],
-        margins=True,
-        margins_name='TOTAL'
-    )
-
-    pct_by_sector = pd.crosstab(
-        df['origin_sector'],
-        df['mode_category'],
-        normalize='index'
-    ) * 100
-
-    pct_by_mode = pd.crosstab(
-        df['origin_sector'],
-        df['mode_category'],
-        normalize='columns'
-    ) * 100
-
-    pct_total = pd.crosstab(
-        df['origin_sector'],
-        df['mode_category'],
-        normalize='all'
-    ) * 100
-
-    df['mode_sustainable'] = df['mode_category'].apply(
-        lambda x: 'Durable (TC+Actif)' if x in ['Transport en commun', 'Modes actifs'] else 'Auto/Autres'
-    )
-
-    sustainable_table = pd.crosstab(
-        df['origin_sector'],
-        df['mode_sustainable'],
-        normalize='index'
-    ) * 100
-
-    dominant_mode = pct_by_sector.idxmax(axis=1)
-
-    ratio_auto_sustainable = []
-    for sector in pct_by_sector.index:
-        auto = pct_by_sector.loc[sector, 'Auto']
-        tc = pct_by_sector.loc[sector, 'Transport en commun']
-        actif = pct_by_sector.loc[sector, 'Modes actifs']
-        ratio = auto / (tc + actif) if (tc + actif) > 0 else np.inf
-        ratio_auto_sustainable.append(ratio)
-
-    diversity_index = []
-    for sector in pct_by_sector.index:
-        probs = pct_by_sector.loc[sector].values / 100
-        probs = probs[probs > 0]
-        diversity = -np.sum(probs * np.log(probs))
-        diversity_index.append(diversity)
+
+def classify_cube(cube):
+    cube = marginal(cube, ['origin', 'mode'])
+    cube = rollup(cube, 'origin', sector_classification, name='origin_sector')
+    return rollup(cube, 'mode', mode_categories, name='mode_category')
+
+
+def add_intervals(summary_stats, intervals, ci=95):
+    summary_stats = summary_stats.copy()
+    stability = intervals['dominant_stability'].round(1)
+    summary_stats.insert(summary_stats.columns.get_loc('Mode dominant') + 1,
+                         'Mode dominant (stabilité %)', stability)
+
+    for column, (key, fmt) in interval_columns.items():
+        low, high = intervals[key]
+        labels = [f'[{fmt.format(lo)} ; {fmt.format(hi)}]' for lo, hi in zip(low, high)]
+        summary_stats.insert(summary_stats.columns.get_loc(column) + 1, f'{column} IC{ci}%', labels)
+    return summary_stats
+
+
+def factor_squares(data, weights):
+    # Sum of squared expansion factors per origin x mode cell, from the trips or a saved state.
+    if isinstance(data, dict):
+        if 'squares' not in data:
+            raise ValueError("État agrégé sans somme des carrés des facteurs: le reconstruire pour le bootstrap pondéré")
+        return as_cube(dict(data, counts=data['squares']), ['origin', 'mode'])
+    factors = np.asarray(data[weights] if isinstance(weights, str) else weights, dtype=np.float64)
+    return as_cube(data, ['origin', 'mode'], weights=factors ** 2)
+
+
+@memoize(depends=(sector_classification, mode_categories, sustainable_groups))
+def create_comprehensive_table(data, weights=None, n_boot=0, seed=None):
+    cube = classify_cube(as_cube(data, ['origin', 'mode'], weights=weights))
+
+    freq_table = crosstab(cube, 'origin_sector', 'mode_category', margins=True, margins_name='TOTAL')
+    pct_by_sector = crosstab(cube, 'origin_sector', 'mode_category', normalize='index') * 100
+    pct_by_mode = crosstab(cube, 'origin_sector', 'mode_category', normalize='columns') * 100
+    pct_total = crosstab(cube, 'origin_sector', 'mode_category', normalize='all') * 100
+
+    sustainable = rollup(cube, 'mode_category', sustainable_groups, name='mode_sustainable')
+    sustainable_table = crosstab(sustainable, 'origin_sector', 'mode_sustainable', normalize='index') * 100
+
+    table = crosstab(cube, 'origin_sector', 'mode_category')
+    modes = list(table.columns)
+    point = summary_arrays(table.values, modes)
 
     summary_stats = pd.DataFrame({
-        'Déplacements (n)': freq_table.drop('TOTAL', errors='ignore').sum(axis=1),
-        'Mode dominant': dominant_mode,
-        'Part dominante (%)': pct_by_sector.max(axis=1).round(1),
-        'TC + Actifs (%)': (pct_by_sector['Transport en commun'] + pct_by_sector['Modes actifs']).round(1),
-        'Ratio Auto/(TC+Actifs)': [f'{r:.2f}' for r in ratio_auto_sustainable],
-        'Diversité modale': [f'{d:.3f}' for d in diversity_index]
-    })
+        'Déplacements (n)': point['n'].round().astype(np.int64),
+        'Mode dominant': table.columns[point['dominant']],
+        'Part dominante (%)': point['dominant_share'].round(1),
+        'TC + Actifs (%)': point['sustainable_share'].round(1),
+        'Ratio Auto/(TC+Actifs)': [f'{r:.2f}' for r in point['ratio']],
+        'Diversité modale': [f'{d:.3f}' for d in point['diversity']]
+    }, index=table.index)
+
+    if n_boot:
+        # The bootstrap resamples trips, so it always starts from the sample counts.
+        sample = crosstab(classify_cube(as_cube(data, ['origin', 'mode'])), 'origin_sector', 'mode_category')
+        sample = sample.reindex(index=table.index, columns=table.columns, fill_value=0)
+        totals = squares = None
+        if weights is not None:
+            totals = table.values
+            squares = crosstab(classify_cube(factor_squares(data, weights)), 'origin_sector', 'mode_category')
+            squares = squares.reindex(index=table.index, columns=table.columns, fill_value=0).values
+        intervals = bootstrap_summary(sample.values, modes, totals=totals, squares=squares, n_boot=n_boot, seed=seed)
+        summary_stats = add_intervals(summary_stats, intervals)
 
     return {
         'frequencies': freq_table,
@@ -108,15 +117,12 @@ def create_comprehensive_table(df):
     }
 
 
-def export_to_csv(tables, filename='analyse_contingence_q1.xlsx'):
-    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-        tables['frequencies'].to_excel(writer, sheet_name='Fréquences')
-        tables['pct_by_sector'].to_excel(writer, sheet_name='Pct par secteur')
-        tables['pct_by_mode'].to_excel(writer, sheet_name='Pct par mode')
-        tables['sustainable'].to_excel(writer, sheet_name='Modes durables')
-        tables['summary'].to_excel(writer, sheet_name='Statistiques')
-    
+def export_to_csv(tables, filename='analyse_contingence_q1.xlsx', formats=None):
+    return export_tables({sheet_titles[key]: table for key, table in tables.items()}, filename, formats)
+
+
 if __name__ == '__main__':
-    df = pd.read_csv('_CLEANDATA_.csv')
-    tables = create_comprehensive_table(df)
+    state_path = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1].endswith('.npz') else None
+    data = load_data('_CLEANDATA_.csv', state_path)
+    tables = create_comprehensive_table(data, weights=weight_col, n_boot=2000, seed=2022)
     export_to_csv(tables)
\ No newline at end of file
@@ -2,132 +2,120 @@
 # Programme : Heatmap des résidus et test chi-carré.
 # Date: 31 Décembre 2025
 
+import os
+import sys
+
 import pandas as pd
-import numpy as np
-from scipy.stats import chi2_contingency
-import matplotlib.pyplot as plt
-import seaborn as sns
-import matplotlib as mpl
-
-df = pd.read_csv("_CLEANDATA_.csv")
-
-COL_PURPOSE = "trippurpose"
-COL_MODE = "modeprimary"
-
-purpose_map = {
-    'Travail': [10, 11, 12],
-    'Études': [20, 30],
-    'Achats': [40, 41],
-    'Loisirs': [44, 45, 46],
-    'Retour': [80],
-    'Passagers': [51, 52],
-    'Autre': [43, 777, 888]
-}
-
-mode_map = {
-    'Auto': [1, 2],
-    'Transport en commun': [3, 4, 5],
-    'Modes actifs': [6, 7, 14, 15],
-    'Autres': [8, 9, 10, 11, 13, 16, 18, 21, 22, 23, 24, 77]
-}
-
-def map_category(val, mapping):
-    for k, codes in mapping.items():
-        if val in codes:
-            return k
-    return np.nan
-
-df["purpose_cat"] = df[COL_PURPOSE].apply(lambda x: map_category(x, purpose_map))
-df["mode_cat"] = df[COL_MODE].apply(lambda x: map_category(x, mode_map))
-df = df.dropna(subset=["purpose_cat", "mode_cat"])
-
-time_periods = {
-    'Matin pointe': (600, 900),
-    'Jour': (900, 1600),
-    'PM pointe': (1600, 1900),
-    'Soir': (1900, 2800)
-}
-
-def map_time(t):
-    for k, (a, b) in time_periods.items():
-        if a <= t < b:
-            return k
-    return np.nan
-
-df["time_cat"] = df["departtime"].apply(map_time)
-df = df.dropna(subset=["time_cat"])
-
-periods = list(time_periods.keys())
-resid_dict = {}
-stats = {}
-max_abs = 0.0
-
-for period in periods:
-    sub = df[df["time_cat"] == period]
-    observed = pd.crosstab(sub["purpose_cat"], sub["mode_cat"])
-
-    if observed.shape[0] < 2 or observed.shape[1] < 2:
-        resid_dict[period] = None
-        continue
-
-    chi2, p, dof, expected = chi2_contingency(observed)
-    residuals = (observed - expected) / np.sqrt(expected)
-
-    resid_dict[period] = residuals
-    stats[period] = (chi2, p, dof, observed.sum().sum())
-    max_abs = max(max_abs, residuals.abs().values.max())
-
-fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-axes = axes.flatten()
-
-for ax, period in zip(axes, periods):
-    residuals = resid_dict.get(period)
-
-    sns.heatmap(
-        residuals,
-        annot=True,
-        fmt=".1f",
-        cmap="coolwarm",
-        center=0,
-        vmin=-max_abs,
-        vmax=max_abs,
-        annot_kws={"fontsize": 14, "fontweight": "bold"},
-        ax=ax,
-        cbar=False
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from transod.categories import mode_categories, purpose_map
+from transod.contingency import chi2_batch
+from transod.cube import as_cube, hour_groups, marginal, rollup
+from transod.incremental import load_data
+from transod.memo import memoize
+from transod.render import show
+from transod.timebins import time_periods
+
+
+@memoize(depends=(mode_categories, purpose_map, time_periods))
+def period_residuals(data):
+    cube = as_cube(data, ["hour", "purpose", "mode"])
+    cube = rollup(cube, "hour", hour_groups(time_periods), name="period")
+    cube = rollup(cube, "mode", mode_categories, name="mode_cat")
+
+    tables = marginal(cube, ["period", "purpose", "mode_cat"])
+    results = chi2_batch(tables["counts"])
+    resid_dict = {}
+    stats = {}
+    max_abs = 0.0
+
+    for i, period in enumerate(tables["labels"]["period"]):
+        counts = tables["counts"][i]
+        rows = counts.sum(axis=1) > 0
+        cols = counts.sum(axis=0) > 0
+
+        if rows.sum() < 2 or cols.sum() < 2:
+            resid_dict[period] = None
+            continue
+
+        residuals = pd.DataFrame(
+            results["residuals"][i][rows][:, cols],
+            index=[label for label, keep in zip(tables["labels"]["purpose"], rows) if keep],
+            columns=[label for label, keep in zip(tables["labels"]["mode_cat"], cols) if keep]
+        )
+
+        resid_dict[period] = residuals
+        stats[period] = (results["chi2"][i], results["p"][i], results["dof"][i], results["n"][i])
+        max_abs = max(max_abs, residuals.abs().values.max())
+
+    return resid_dict, stats, max_abs
+
+
+def plot_period_residuals(resid_dict, max_abs, periods=None):
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    periods = periods or list(time_periods.keys())
+
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    axes = axes.flatten()
+
+    for ax, period in zip(axes, periods):
+        residuals = resid_dict.get(period)
+
+        sns.heatmap(
+            residuals,
+            annot=True,
+            fmt=".1f",
+            cmap="coolwarm",
+            center=0,
+            vmin=-max_abs,
+            vmax=max_abs,
+            annot_kws={"fontsize": 14, "fontweight": "bold"},
+            ax=ax,
+            cbar=False
+        )
+
+        ax.set_title(period, fontsize=16, fontweight='bold')
+        ax.set_xlabel('')
+        ax.set_ylabel('')
+        ax.tick_params(axis='x', labelrotation=30)
+        ax.tick_params(axis='y', labelrotation=0)
+        ax.tick_params(axis='both', labelsize=10)
+
+    norm = mpl.colors.Normalize(vmin=-max_abs, vmax=max_abs)
+    sm = mpl.cm.ScalarMappable(cmap="coolwarm", norm=norm)
+    sm.set_array([])
+
+    fig.subplots_adjust(
+        left=0.16,   # wider plots, still enough room for Y label
+        right=0.86,
+        top=0.90,
+        bottom=0.12,
+        wspace=0.40,
+        hspace=0.35
     )
 
-    ax.set_title(period, fontsize=16, fontweight='bold')
-    ax.set_xlabel('')
-    ax.set_ylabel('')
-    ax.tick_params(axis='x', labelrotation=30)
-    ax.tick_params(axis='y', labelrotation=0)
-    ax.tick_params(axis='both', labelsize=10)
-
-norm = mpl.colors.Normalize(vmin=-max_abs, vmax=max_abs)
-sm = mpl.cm.ScalarMappable(cmap="coolwarm", norm=norm)
-sm.set_array([])
-
-fig.subplots_adjust(
-    left=0.16,   # wider plots, still enough room for Y label
-    right=0.86,
-    top=0.90,
-    bottom=0.12,
-    wspace=0.40,
-    hspace=0.35
-)
-
-cbar_ax = fig.add_axes([0.88, 0.15, 0.02, 0.7])
-cbar = fig.colorbar(sm, cax=cbar_ax)
-cbar.set_label("Résidus standardisés", fontsize=13, fontweight='bold')
-
-fig.suptitle("Résidus standardisés : Motif × Mode par période",
-             fontsize=20, fontweight='bold')
-
-fig.text(0.5, 0.05, 'Mode', ha='center',
-         fontsize=14, fontweight='bold')
-
-fig.text(0.085, 0.5, 'Motif de déplacement',
-         va='center', rotation='vertical',
-         fontsize=14, fontweight='bold')
-
-plt.show()
\ No newline at end of file
+    cbar_ax = fig.add_axes([0.88, 0.15, 0.02, 0.7])
+    cbar = fig.colorbar(sm, cax=cbar_ax)
+    cbar.set_label("Résidus standardisés", fontsize=13, fontweight='bold')
+
+    fig.suptitle("Résidus standardisés : Motif × Mode par période",
+                 fontsize=20, fontweight='bold')
+
+    fig.text(0.5, 0.05, 'Mode', ha='center',
+             fontsize=14, fontweight='bold')
+
+    fig.text(0.085, 0.5, 'Motif de déplacement',
+             va='center', rotation='vertical',
+             fontsize=14, fontweight='bold')
+
+    return fig
+
+
+if __name__ == '__main__':
+    state_path = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1].endswith('.npz') else None
+    resid_dict, stats, max_abs = period_residuals(load_data("_CLEANDATA_.csv", state_path))
+    show(plot_period_residuals(resid_dict, max_abs))
@@ -2,25 +2,15 @@
 # Programme : Graphiques à ligne brisée pour la deuxième question
 # Date: 31 Décembre 2025
 
-import pandas as pd
-import matplotlib.pyplot as plt
-
-purpose_map = {
-    'Travail': [10, 11, 12],
-    'Études': [20, 30],
-    'Achats': [40, 41],
-    'Loisirs': [44, 45, 46],
-    'Retour': [80],
-    'Passagers': [51, 52],
-    'Autre': [43, 777, 888]
-}
+import os
+import sys
 
-mode_map = {
-    'Auto': [1, 2],
-    'Transport en commun': [3, 4, 5],
-    'Modes actifs': [6, 7, 14, 15],
-    'Autres': [8, 9, 10, 11, 13, 16, 18, 21, 22, 23, 24, 77]
-}
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from transod.categories import mode_categories
+from transod.cube import as_cube, crosstab, hour_groups, marginal, rollup, select, to_series, weight_col
+from transod.incremental import load_data
+from transod.render import show
 
 time_periods = {
     'Matin pointe (6h-9h)': (600, 900),
@@ -47,51 +37,28 @@ purpose_colors = {
 }
 
 
-def classify_purpose(code):
-    for purpose, codes in purpose_map.items():
-        if code in codes:
-            return purpose
-    return 'Autre'
-
-
-def classify_mode(code):
-    for mode, codes in mode_map.items():
-        if code in codes:
-            return mode
-    return 'Autres'
+def prepare_data(data, weights=None):
+    cube = as_cube(data, ['hour', 'purpose', 'mode'], weights=weights)
 
+    in_periods = sorted(hour for hours in hour_groups(time_periods).values() for hour in hours)
+    cube = select(cube, 'hour', in_periods)
+    cube = rollup(cube, 'hour', {hour: [hour, hour + 24] for hour in range(24)})
+    return rollup(cube, 'mode', mode_categories, name='mode_category')
 
-def classify_time_period(time):
-    for period, (start, end) in time_periods.items():
-        if start <= time < end:
-            return period
-    return 'Autre'
 
+def plot_profiles(cube, figsize=(14, 7)):
+    import matplotlib.pyplot as plt
 
-def get_hour(time):
-    if time >= 2400:
-        return (time - 2400) // 100
-    return time // 100
-
-
-def prepare_data(df):
-    df = df.copy()
-    df['trip_purpose'] = df['trippurpose'].apply(classify_purpose)
-    df['mode_category'] = df['modeprimary'].apply(classify_mode)
-    df['time_period'] = df['departtime'].apply(classify_time_period)
-    df['hour'] = df['departtime'].apply(get_hour)
-    df = df[df['time_period'] != 'Autre']
-    return df
-
-
-def plot_profiles(df, figsize=(14, 7)):
     fig, ax = plt.subplots(figsize=figsize)
 
     main_purposes = ['Travail', 'Études', 'Achats', 'Loisirs', 'Retour', 'Passagers', 'Autre']
+    profiles = crosstab(cube, 'purpose', 'hour')
 
     for purpose in main_purposes:
-        df_purpose = df[df['trip_purpose'] == purpose]
-        hourly_counts = df_purpose.groupby('hour').size()
+        if purpose not in profiles.index:
+            continue
+        hourly_counts = profiles.loc[purpose]
+        hourly_counts = hourly_counts[hourly_counts > 0]
 
         ax.plot(hourly_counts.index, hourly_counts.values,
                 linewidth=3, marker='o', markersize=6,
@@ -106,12 +73,14 @@ def plot_profiles(df, figsize=(14, 7)):
     ax.set_xlim(4, 24)
 
     plt.tight_layout()
-    plt.show()
+    return fig
+
 
+def plot_hourly(cube, figsize=(12, 5)):
+    import matplotlib.pyplot as plt
 
-def plot_hourly(df, figsize=(12, 5)):
     fig, ax = plt.subplots(figsize=figsize)
-    hourly_counts = df.groupby('hour').size().reindex(range(0, 30), fill_value=0)
+    hourly_counts = to_series(marginal(cube, ['hour'])).reindex(range(0, 30), fill_value=0)
 
     ax.plot(hourly_counts.index, hourly_counts.values,
             linewidth=3, marker='o', markersize=6,
@@ -125,11 +94,11 @@ def plot_hourly(df, figsize=(12, 5)):
     ax.set_xticks(list(range(5, 24)))
 
     plt.tight_layout()
-    plt.show()
+    return fig
 
 if __name__ == '__main__':
-    df = pd.read_csv('_CLEANDATA_.csv')
+    state_path = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1].endswith('.npz') else None
+    data = load_data('_CLEANDATA_.csv', state_path)
 
-    df_prepared = prepare_data(df)
-    plot_profiles(df_prepared)
-    plot_hourly(df_prepared)
\ No newline at end of file
+    cube = prepare_data(data, weights=weight_col)
+    show([plot_profiles(cube), plot_hourly(cube)])
\ No newline at end of file
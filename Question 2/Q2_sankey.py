@@ -2,25 +2,17 @@
 # Programme : Graphique Sankey qui montre le flux de temps - Motif - mode
 # Date: 31 Décembre 2025
 
-import pandas as pd
-import plotly.graph_objects as go
-
-purpose_map = {
-    'Travail': [10, 11, 12],
-    'Études': [20, 30],
-    'Achats': [40, 41],
-    'Loisirs': [44, 45, 46],
-    'Retour': [80],
-    'Passagers': [51, 52],
-    'Autre': [43, 777, 888]
-}
+import os
+import sys
 
-mode_map = {
-    'Auto': [1, 2],
-    'Transport en commun': [3, 4, 5],
-    'Modes actifs': [6, 7, 14, 15],
-    'Autres': [8, 9, 10, 11, 13, 16, 18, 21, 22, 23, 24, 77]
-}
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from transod.categories import mode_categories, purpose_map, sector_classification
+from transod.cube import as_cube, hour_groups, rollup, weight_col
+from transod.incremental import load_data
+from transod.memo import memoize
+from transod.render import show
+from transod.sankey import sankey_data
 
 time_periods = {
     'Matin pointe (6h-9h)': (600, 900),
@@ -36,6 +28,12 @@ colors = {
     'Autres': '#ffa600'
 }
 
+sector_colors = {
+    'Centre-ville': '#E63946',
+    'Banlieue intérieure': '#457B9D',
+    'Banlieue extérieure': '#2A9D8F'
+}
+
 purpose_colors = {
     'Travail': '#003f5c',
     'Études': '#58508d',
@@ -47,117 +45,49 @@ purpose_colors = {
 }
 
 
-def classify_purpose(code):
-    for purpose, codes in purpose_map.items():
-        if code in codes:
-            return purpose
-    return 'Autre'
-
-
-def classify_mode(code):
-    for mode, codes in mode_map.items():
-        if code in codes:
-            return mode
-    return 'Autres'
-
-
-def classify_time(time):
-    for period, (start, end) in time_periods.items():
-        if start <= time < end:
-            return period
-    return 'Autre'
-
-
-def get_hour(time):
-    if time >= 2400:
-        return (time - 2400) // 100
-    return time // 100
-
-
-def prepare_data(df):
-    df = df.copy()
-    df['trip_purpose'] = df['trippurpose'].apply(classify_purpose)
-    df['mode_category'] = df['modeprimary'].apply(classify_mode)
-    df['time_period'] = df['departtime'].apply(classify_time)
-    df['hour'] = df['departtime'].apply(get_hour)
-    df = df[df['time_period'] != 'Autre']
-    return df
-
-
-def plot_sankey(df, max_flows=50, node_label_size=18):
-    df_sample = df.sample(min(len(df), 5000), random_state=42)
-    flow_counts = df_sample.groupby(['time_period', 'trip_purpose', 'mode_category']).size().reset_index(name='count')
-    flow_counts = flow_counts.nlargest(max_flows, 'count')
-
-    time_nodes = list(flow_counts['time_period'].unique())
-    purpose_nodes = list(flow_counts['trip_purpose'].unique())
-    mode_nodes = list(flow_counts['mode_category'].unique())
-
-    all_nodes = time_nodes + purpose_nodes + mode_nodes
-    node_dict = {node: idx for idx, node in enumerate(all_nodes)}
-
-    source = []
-    target = []
-    value = []
-    link_color_sources = []
-
-    def hex_to_rgba(hex_color, alpha=0.25):
-        hex_color = str(hex_color).lstrip('#')
-        if len(hex_color) == 3:
-            hex_color = ''.join([c*2 for c in hex_color])
-        try:
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-        except Exception:
-            r, g, b = (150, 150, 150)
-        return f'rgba({r},{g},{b},{alpha})'
-
-    tp_links = (flow_counts.groupby(['time_period', 'trip_purpose'])['count']
-                .sum().reset_index())
-    for _, row in tp_links.iterrows():
-        src = node_dict[row['time_period']]
-        tgt = node_dict[row['trip_purpose']]
-        source.append(src)
-        target.append(tgt)
-        value.append(row['count'])
-        link_color_sources.append(hex_to_rgba('#90D5FF', alpha=0.25))
-
-    pm_links = (flow_counts.groupby(['trip_purpose', 'mode_category'])['count']
-                .sum().reset_index())
-    for _, row in pm_links.iterrows():
-        src = node_dict[row['trip_purpose']]
-        tgt = node_dict[row['mode_category']]
-        source.append(src)
-        target.append(tgt)
-        value.append(row['count'])
-        hexcol = purpose_colors.get(row['trip_purpose'], '#95a5a6')
-        link_color_sources.append(hex_to_rgba(hexcol, alpha=0.25))
-
-    node_colors = []
-    for node in all_nodes:
-        if node in time_periods:
-            node_colors.append('#90D5FF')
-        elif node in purpose_colors:
-            node_colors.append(purpose_colors[node])
-        elif node in colors:
-            node_colors.append(colors[node])
-        else:
-            node_colors.append('#95a5a6')
+stage_colors = {
+    'origin_sector': sector_colors,
+    'period': '#90D5FF',
+    'purpose': purpose_colors,
+    'mode_category': colors
+}
+
+default_stages = ['period', 'purpose', 'mode_category']
+
+
+def prepare_data(data, weights=None, stages=None):
+    stages = stages or default_stages
+    dims = (['origin'] if 'origin_sector' in stages else []) + ['hour', 'purpose', 'mode']
+    cube = as_cube(data, dims, weights=weights)
+
+    if 'origin_sector' in stages:
+        cube = rollup(cube, 'origin', sector_classification, name='origin_sector')
+    cube = rollup(cube, 'hour', hour_groups(time_periods), name='period')
+    return rollup(cube, 'mode', mode_categories, name='mode_category')
+
+
+@memoize(depends=(time_periods, sector_classification, purpose_map, mode_categories))
+def sankey_flows(data, weights=None, stages=None, max_flows=50):
+    stages = stages or default_stages
+    return sankey_data(prepare_data(data, weights, stages), stages, stage_colors, max_flows=max_flows)
+
+
+def plot_sankey(flows, node_label_size=18):
+    import plotly.graph_objects as go
 
     fig = go.Figure(data=[go.Sankey(
         node=dict(
             pad=15,
             thickness=20,
             line=dict(color="black", width=0.5),
-            label=all_nodes,
-            color=node_colors
+            label=flows['labels'],
+            color=flows['node_colors']
         ),
         link=dict(
-            source=source,
-            target=target,
-            value=value,
-            color=link_color_sources
+            source=flows['source'],
+            target=flows['target'],
+            value=flows['value'],
+            color=flows['link_colors']
         )
     )])
 
@@ -166,11 +96,10 @@ def plot_sankey(df, max_flows=50, node_label_size=18):
         height=700, width=1200
     )
 
-    fig.show()
+    return fig
 
 
 if __name__ == '__main__':
-    df = pd.read_csv('_CLEANDATA_.csv')
-    
-    df_prepared = prepare_data(df)
-    plot_sankey(df_prepared)
\ No newline at end of file
+    state_path = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1].endswith('.npz') else None
+    data = load_data('_CLEANDATA_.csv', state_path)
+    show(plot_sankey(sankey_flows(data, weights=weight_col)))
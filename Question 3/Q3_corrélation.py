@@ -2,120 +2,27 @@
 # Programme : Nuage à points avec régression et matrice de corrélation complexe
 # Date: 3 Janvier 2025
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from math import radians, sin, cos, sqrt, atan2
-from scipy.stats import pearsonr
-
-df = pd.read_csv('_CLEANDATA_.csv')
-
-zone_coords = {
-    1: (45.4215, -75.6972), 50: (45.4050, -75.6800), 100: (45.4350, -75.6500),
-    120: (45.3900, -75.6700), 140: (45.3850, -75.6600), 180: (45.3650, -75.6700),
-    200: (45.3700, -75.7200), 240: (45.3800, -75.7400), 260: (45.3500, -75.7600),
-    300: (45.4700, -75.5200), 350: (45.5200, -75.5500), 360: (45.3200, -75.5800),
-    400: (45.3500, -75.5500), 425: (45.3000, -75.7000), 450: (45.2500, -75.7500),
-    500: (45.3500, -75.9000), 560: (45.4000, -75.9500), 600: (45.4300, -75.7100),
-    625: (45.4500, -75.7500), 650: (45.4800, -75.7300), 700: (45.4000, -75.8500),
-    750: (45.5500, -75.9000), 800: (45.4650, -75.7200), 820: (45.4800, -75.6800),
-    840: (45.5500, -75.6000), 845: (45.6000, -75.5500)
-}
-
-def calculate_distance(lat1, lon1, lat2, lon2):
-    R = 6371.0
-    lat1_rad = radians(lat1)
-    lon1_rad = radians(lon1)
-    lat2_rad = radians(lat2)
-    lon2_rad = radians(lon2)
-    
-    dlon = lon2_rad - lon1_rad
-    dlat = lat2_rad - lat1_rad
-    
-    a = sin(dlat/2)**2 + cos(lat1_rad) * cos(lat2_rad) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    distance = R * c
-    
-    return distance
-
-centre_ville_coords = zone_coords[1]
-
-zones_dict = {
-    1: 'Ottawa Centre', 50: 'Ottawa Inner Area', 100: 'Ottawa East',
-    120: 'Beacon Hill', 140: 'Alta Vista', 180: 'Hunt Club',
-    200: 'Merivale', 240: 'Ottawa West', 260: 'Bayshore/Cedarview',
-    300: 'Orleans', 350: 'Rural East', 360: 'Rural Southeast',
-    400: 'South Gloucester/Letrim', 425: 'South Nepean', 450: 'Rural Southwest',
-    500: 'Kanata/Stittsville', 560: 'Rural West', 600: 'Île de Hull',
-    625: 'Hull Périphérie', 650: 'Plateau', 700: 'Aylmer',
-    750: 'Rural Northwest', 800: 'Gatineau Centre', 820: 'Gatineau Est',
-    840: 'Rural Northeast', 845: 'Masson-Angers'
-}
-
-sector_classification = {
-    'Centre-ville': [1, 50, 100, 240, 600, 800],
-    'Banlieue intérieure': [120, 140, 180, 200, 260, 625, 650, 700, 820],
-    'Banlieue extérieure': [300, 400, 425, 500, 350, 360, 450, 560, 750, 840, 845]
-}
-
-mode_categories = {
-    'Auto': [1, 2],
-    'Transport en commun': [3, 4, 5],
-    'Modes actifs': [6, 7, 14, 15],
-    'Autres': [8, 9, 10, 11, 13, 16, 18, 21, 22, 23, 24, 77]
-}
-
-zone_col = 'originreportzone'
-mode_col = 'modeprimary'
+import os
+import sys
 
-df_clean = df.dropna(subset=[zone_col, mode_col])
+import numpy as np
 
-def get_sector_category(zone_id):
-    for categorie, zones in sector_classification.items():
-        if zone_id in zones:
-            return categorie
-    return None
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-def get_mode_category(mode_id):
-    for categorie, modes in mode_categories.items():
-        if mode_id in modes:
-            return categorie
-    return None
+from transod.categories import mode_categories, sector_classification, zones_dict
+from transod.correlation import global_group, pair, pairwise_stats, significance
+from transod.cube import weight_col
+from transod.distance import zone_coords
+from transod.incremental import load_data
+from transod.memo import memoize
+from transod.render import show
+from transod.zones import zone_features
 
-df_clean['Categorie_Secteur'] = df_clean[zone_col].apply(get_sector_category)
-df_clean['Categorie_Mode'] = df_clean[mode_col].apply(get_mode_category)
 
-zone_data = []
+@memoize(depends=(mode_categories, sector_classification, zones_dict, zone_coords))
+def build_analysis_df(data, weights=None):
+    return zone_features(data, side='origin', weights=weights)
 
-for zone_id, zone_name in zones_dict.items():
-    df_zone = df_clean[df_clean[zone_col] == zone_id]
-    total_deplacements = len(df_zone)
-    
-    if total_deplacements > 0:
-        part_auto = len(df_zone[df_zone['Categorie_Mode'] == 'Auto']) / total_deplacements * 100
-        part_tc = len(df_zone[df_zone['Categorie_Mode'] == 'Transport en commun']) / total_deplacements * 100
-        part_actifs = len(df_zone[df_zone['Categorie_Mode'] == 'Modes actifs']) / total_deplacements * 100
-        
-        zone_lat, zone_lon = zone_coords[zone_id]
-        distance_km = calculate_distance(centre_ville_coords[0], centre_ville_coords[1], 
-                                        zone_lat, zone_lon)
-        
-        secteur = get_sector_category(zone_id)
-        
-        zone_data.append({
-            'Zone_ID': zone_id,
-            'Zone_Nom': zone_name,
-            'Secteur': secteur,
-            'Distance_km': distance_km,
-            'Part_Auto': part_auto,
-            'Part_TC': part_tc,
-            'Part_Actifs': part_actifs,
-            'Total_Deplacements': total_deplacements
-        })
-
-analysis_df = pd.DataFrame(zone_data)
 
 # Module-level configuration (replaces CorrelationMatrix class variables)
 num_vars = ["Distance_km", "Part_Auto", "Part_TC", "Part_Actifs"]
@@ -133,58 +40,69 @@ var_labels = {
 }
 
 
-def corr_by_secteur(x, y, **kws):
-    ax = plt.gca()
-    df_temp = kws.get("data", analysis_df)
+def corr_by_secteur(x, y, pair_table=None, **kws):
+    import matplotlib.pyplot as plt
 
-    ypos = 0.85
-    for secteur, color in secteur_colors.items():
-        sub = df_temp[df_temp["Secteur"] == secteur]
-        if len(sub) > 2:
-            r, p = pearsonr(sub[x.name].dropna(), sub[y.name].dropna())
-            sig = "***" if p < 0.001 else "**" if p < 0.01 else "*" if p < 0.05 else ""
-            ax.text(0.5, ypos, f"{secteur}: r = {r:.3f}{sig}",
+    # The PairGrid calls this once per sector (hue level, in secteur_colors order):
+    # each call writes its own sector line and the last one adds the global box.
+    ax = plt.gca()
+    secteurs = list(secteur_colors)
+    label = kws.get("label")
+
+    for secteur in secteurs if label is None else [label]:
+        if secteur not in pair_table["groups"]:
+            continue
+        result = pair(pair_table, y.name, x.name, secteur)
+        if result["n"] > 2:
+            ypos = 0.85 - 0.18 * secteurs.index(secteur)
+            ax.text(0.5, ypos, f"{secteur}: r = {result['r']:.3f}{significance(result['p'])}",
                     transform=ax.transAxes,
-                    ha="center", va="center", fontsize=11, color=color,
+                    ha="center", va="center", fontsize=11, color=secteur_colors[secteur],
                     fontweight="bold")
-        ypos -= 0.18
 
-    r_global, p_global = pearsonr(df_temp[x.name].dropna(), df_temp[y.name].dropna())
-    sig_global = "***" if p_global < 0.001 else "**" if p_global < 0.01 else "*" if p_global < 0.05 else ""
-    ax.text(0.5, ypos, f"Corrélation globale: r = {r_global:.3f}{sig_global}",
+    if label is not None and label != secteurs[-1]:
+        return
+
+    result = pair(pair_table, y.name, x.name)
+    ax.text(0.5, 0.85 - 0.18 * len(secteurs), f"Corrélation globale: r = {result['r']:.3f}{significance(result['p'])}",
             transform=ax.transAxes,
             ha="center", va="center", fontsize=12, color="black",
             bbox=dict(facecolor="lightgrey", edgecolor="black", boxstyle="round,pad=0.3", alpha=0.9))
 
 
-def scatter_with_regression(x, y, **kws):
+def scatter_with_regression(x, y, pair_table=None, **kws):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     ax = plt.gca()
     color = kws.get("color")
 
     ax.scatter(x, y, color=color, alpha=0.6, s=100, edgecolor='black', linewidth=1)
 
-    if len(x) > 2:
-        mask = ~(np.isnan(x) | np.isnan(y))
-        if mask.sum() > 2:
-            X = x[mask].values.reshape(-1, 1)
-            Y = y[mask].values
-            model = np.polyfit(X.flatten(), Y, 1)
-            x_range = np.linspace(X.min(), X.max(), 100)
-            y_pred = np.polyval(model, x_range)
+    result = pair(pair_table, y.name, x.name, kws.get("label", global_group))
+    if result["n"] > 2:
+        x_valid = x[np.isfinite(x)]
+        x_range = np.linspace(x_valid.min(), x_valid.max(), 100)
+        y_pred = result["intercept"] + result["slope"] * x_range
+
+        try:
+            darker_color = sns.set_hls_values(color, l=.3)
+        except Exception:
+            darker_color = color
+
+        ax.plot(x_range, y_pred, color=darker_color, linewidth=2.5, zorder=3, alpha=0.9)
 
-            try:
-                darker_color = sns.set_hls_values(color, l=.3)
-            except Exception:
-                darker_color = color
 
-            ax.plot(x_range, y_pred, color=darker_color, linewidth=2.5, zorder=3, alpha=0.9)
+def plot_correlation_matrix(analysis_df, pair_table=None):
+    import seaborn as sns
 
+    if pair_table is None:
+        pair_table = pairwise_stats(analysis_df, num_vars, group="Secteur")
 
-def plot_correlation_matrix():
-    g = sns.PairGrid(analysis_df, vars=num_vars, hue="Secteur", palette=secteur_colors, corner=False, diag_sharey=False, height=3)
+    g = sns.PairGrid(analysis_df, vars=num_vars, hue="Secteur", hue_order=list(secteur_colors), palette=secteur_colors, corner=False, diag_sharey=False, height=3)
 
-    g.map_lower(scatter_with_regression)
-    g.map_upper(corr_by_secteur)
+    g.map_lower(scatter_with_regression, pair_table=pair_table)
+    g.map_upper(corr_by_secteur, pair_table=pair_table)
     g.map_diag(sns.histplot, kde=True, alpha=0.7, edgecolor='black')
 
     for i in range(len(num_vars)):
@@ -215,18 +133,22 @@ def plot_correlation_matrix():
     for i, (secteur, color) in enumerate(secteur_colors.items()):
         g.fig.text(xpos_start + i * spacing, 0.89, secteur, color=color, fontsize=14, fontweight="bold")
 
-    plt.show()
     return g
 
-def scatterplot():
-    
+def scatterplot(analysis_df, pair_table=None):
+    import matplotlib.pyplot as plt
+
+    if pair_table is None:
+        pair_table = pairwise_stats(analysis_df, num_vars, group="Secteur")
+
     x = analysis_df['Distance_km'].values
     y = analysis_df['Part_Auto'].values
     
-    slope, intercept, r_value, p_value, std_err = stats.linregress(x, y)
-    r_squared = r_value ** 2
+    result = pair(pair_table, 'Part_Auto', 'Distance_km')
+    slope, intercept = result['slope'], result['intercept']
+    r_value, r_squared = result['r'], result['r2']
     
-    plt.figure(figsize=(10, 7))
+    fig = plt.figure(figsize=(10, 7))
     
     for secteur, color in secteur_colors.items():
         df_secteur = analysis_df[analysis_df['Secteur'] == secteur]
@@ -252,8 +174,10 @@ def scatterplot():
     plt.legend(fontsize=11)
     plt.tight_layout()
 
-    plt.show()
+    return fig
     
 if __name__ == "__main__":
-    scatterplot()
-    plot_correlation_matrix()
\ No newline at end of file
+    state_path = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1].endswith('.npz') else None
+    analysis_df = build_analysis_df(load_data('_CLEANDATA_.csv', state_path), weights=weight_col)
+    pair_table = pairwise_stats(analysis_df, num_vars, group="Secteur")
+    show([scatterplot(analysis_df, pair_table), plot_correlation_matrix(analysis_df, pair_table)])
@@ -0,0 +1,332 @@
+# Auteur : Rémy Wilson
+# Programme : Banc d'essai de chaque étape du pipeline sur des données de tailles croissantes.
+# Date: 18 Octobre 2026
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from transod.categories import lookup_codes, mode_categories, mode_lookup, purpose_lookup, sector_classification, sector_lookup
+from transod.contingency import chi2_batch
+from transod.cube import build_cube, crosstab, hour_groups, marginal, rollup, weight_col
+from transod.filtering import filter_csv, filter_frame
+from transod.incremental import aggregate_csv
+from transod.od import build_od, od_matrix, sector_rollup, top_flows
+from transod.sankey import sankey_data
+from transod.synth import fit_model, generate_csv
+from transod.timebins import bin_departures, time_periods
+from transod.zones import zone_features
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+source_csv = os.path.join(repo_root, 'Filtering', '_TRANSOD2022.csv')
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+sizes = {'150k': 150_000, '1M': 1_000_000, '10M': 10_000_000, '100M': 100_000_000}
+
+# Above this many rows the whole file is never loaded: only the chunked paths run
+# (filter_csv, aggregate_csv) and the aggregate stages read the chunked cube.
+frame_limit = 10_000_000
+
+
+def make_input(rows, seed=2022, chunk_rows=1_000_000):
+    # Synthetic rows following the joint distribution of the raw extract (invalid
+    # codes included, so filtering has work to do), written chunk by chunk.
+    path = os.path.join(data_dir, f'transod_{rows}.csv')
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        generate_csv(fit_model(pd.read_csv(source_csv)), rows, path, chunk_rows=chunk_rows, seed=seed)
+    return path
+
+
+def stage_csv_load(ctx):
+    return pd.read_csv(ctx['path'])
+
+
+def stage_filter_csv(ctx):
+    output = ctx['path'] + '.filtered'
+    report = filter_csv(ctx['path'], output, chunksize=1_000_000)
+    os.remove(output)
+    return report
+
+
+def stage_aggregate_csv(ctx):
+    return aggregate_csv(ctx['path'], chunksize=1_000_000)
+
+
+def _cube(ctx):
+    return ctx['cube'] if 'cube' in ctx else ctx['aggregate_csv']
+
+
+def stage_filtering(ctx):
+    return filter_frame(ctx['csv_load'])[0]
+
+
+def stage_classification(ctx):
+    df = ctx['filtering']
+    return {
+        'sector': lookup_codes(sector_lookup, df['originreportzone']),
+        'mode': lookup_codes(mode_lookup, df['modeprimary']),
+        'purpose': lookup_codes(purpose_lookup, df['trippurpose']),
+    }
+
+
+def stage_time_bucketing(ctx):
+    return bin_departures(ctx['filtering']['departtime'])
+
+
+def stage_cube(ctx):
+    return build_cube(ctx['filtering'], totals=ctx['filtering'][weight_col])
+
+
+def stage_crosstabs(ctx):
+    cube = rollup(marginal(_cube(ctx), ['origin', 'mode']), 'origin', sector_classification, name='origin_sector')
+    cube = rollup(cube, 'mode', mode_categories, name='mode_category')
+    return [crosstab(cube, 'origin_sector', 'mode_category', normalize=normalize)
+            for normalize in (False, 'index', 'columns', 'all')]
+
+
+def stage_chi_square(ctx):
+    cube = rollup(marginal(_cube(ctx), ['hour', 'purpose', 'mode']), 'hour', hour_groups(time_periods), name='period')
+    cube = rollup(cube, 'mode', mode_categories, name='mode_cat')
+    return chi2_batch(marginal(cube, ['period', 'purpose', 'mode_cat'])['counts'])
+
+
+def stage_zone_features(ctx):
+    return zone_features(_cube(ctx), weights=weight_col)
+
+
+def stage_figure_prep(ctx):
+    cube = rollup(marginal(_cube(ctx), ['origin', 'hour', 'purpose', 'mode']), 'origin', sector_classification,
+                  name='origin_sector')
+    cube = rollup(cube, 'hour', hour_groups(time_periods), name='period')
+    cube = rollup(cube, 'mode', mode_categories, name='mode_category')
+    return sankey_data(cube, ['origin_sector', 'period', 'purpose', 'mode_category'])
+
+
+def stage_od_matrices(ctx):
+    od = build_od(ctx['filtering'], weights=weight_col)
+    return od_matrix(od, period='Matin pointe'), top_flows(od, 20), sector_rollup(od)
+
+
+# In dependency order: each stage reads the results of the ones before it.
+stages = {
+    'csv_load': stage_csv_load,
+    'filter_csv': stage_filter_csv,
+    'aggregate_csv': stage_aggregate_csv,
+    'filtering': stage_filtering,
+    'classification': stage_classification,
+    'time_bucketing': stage_time_bucketing,
+    'cube': stage_cube,
+    'crosstabs': stage_crosstabs,
+    'chi_square': stage_chi_square,
+    'zone_features': stage_zone_features,
+    'figure_prep': stage_figure_prep,
+    'od_matrices': stage_od_matrices,
+}
+
+# Results each stage reads; a result is released once no later stage needs it.
+stage_inputs = {
+    'filtering': ['csv_load'],
+    'classification': ['filtering'],
+    'time_bucketing': ['filtering'],
+    'cube': ['filtering'],
+    'crosstabs': ['cube', 'aggregate_csv'],
+    'chi_square': ['cube', 'aggregate_csv'],
+    'zone_features': ['cube', 'aggregate_csv'],
+    'figure_prep': ['cube', 'aggregate_csv'],
+    'od_matrices': ['filtering'],
+}
+
+# Stages that only read the input file, measured in their own process.
+file_stages = {'csv_load', 'filter_csv', 'aggregate_csv'}
+
+# Stages that hold the whole trip table in memory.
+frame_stages = {'csv_load', 'filtering', 'classification', 'time_bucketing', 'cube', 'od_matrices'}
+
+
+def measure(func, ctx, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        result = None
+        start = time.perf_counter()
+        result = func(ctx)
+        times.append(time.perf_counter() - start)
+
+    # Peak allocation comes from one more, traced run (tracing slows the timed ones
+    # down). The timed result is dropped first, so the stage's output is not counted twice.
+    result = None
+    tracemalloc.start()
+    result = func(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, min(times), peak / 2**20
+
+
+def _max_rss_mb():
+    # VmHWM belongs to the process image; ru_maxrss can carry the high-water mark of
+    # the parent across fork/exec on Linux, so it is only the fallback.
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    # Kilobytes on Linux, bytes on macOS.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == 'darwin' else 2**10)
+
+
+def measure_in_process(stage, path):
+    # Whole-file stages run once in a fresh interpreter: tracemalloc would slow their
+    # Python-level parsing and writing down tenfold, while the high-water mark of a
+    # new process, above its level once imports are done, is the stage's own peak.
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', stage, path],
+                         capture_output=True, text=True, check=True)
+    measured = json.loads(out.stdout.splitlines()[-1])
+    return measured['seconds'], measured['peak_mb']
+
+
+def run_child(stage, path):
+    before = _max_rss_mb()
+    start = time.perf_counter()
+    stages[stage]({'path': path})
+    seconds = time.perf_counter() - start
+    print(json.dumps({'seconds': seconds, 'peak_mb': _max_rss_mb() - before}))
+
+
+def _release(ctx, remaining):
+    needed = {name for stage in remaining for name in stage_inputs.get(stage, [])}
+    for name in [name for name in ctx if name in stages and name not in needed]:
+        del ctx[name]
+
+
+def run(size_names, repeat=3, only=None, limit=frame_limit):
+    # Lazy imports (scipy) are paid here rather than in the first timed run.
+    chi2_batch(np.ones((2, 2)))
+
+    results = []
+    for name in size_names:
+        rows = sizes[name]
+        ctx = {'path': make_input(rows)}
+        # The chunked cube is only needed when the in-memory one is not built.
+        planned = [stage for stage in stages
+                   if not (rows > limit and stage in frame_stages)
+                   and not (rows <= limit and stage == 'aggregate_csv' and only and stage not in only)]
+        for i, stage in enumerate(planned):
+            if stage in file_stages:
+                seconds, peak = measure_in_process(stage, ctx['path'])
+                # Later stages still need the result: it is computed again, untimed.
+                needed = any(stage in stage_inputs.get(later, []) for later in planned[i + 1:])
+                result = stages[stage](ctx) if needed else None
+            else:
+                result, seconds, peak = measure(stages[stage], ctx, repeat)
+            ctx[stage] = result
+            del result
+            _release(ctx, planned[i + 1:])
+            if only and stage not in only:
+                continue
+            results.append({
+                'stage': stage,
+                'size': name,
+                'rows': rows,
+                'seconds': seconds,
+                'rows_per_second': rows / seconds if seconds else None,
+                'peak_mb': peak,
+            })
+            print(f"{name:>5} {stage:<15} {seconds:9.4f} s {peak:9.1f} Mo")
+        for stage in stages:
+            if stage not in planned and (not only or stage in only):
+                print(f"{name:>5} {stage:<15} ignorée (table complète au-delà de {limit} lignes)")
+        del ctx
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo_root,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline, tolerance, memory_tolerance=None):
+    # Slower or more memory-hungry than the baseline beyond the tolerance is a regression.
+    memory_tolerance = tolerance if memory_tolerance is None else memory_tolerance
+    reference = {(r['stage'], r['size']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        base = reference.get((r['stage'], r['size']))
+        if base is None:
+            continue
+        ratio = r['seconds'] / base['seconds'] if base['seconds'] else float('inf')
+        memory_ratio = r['peak_mb'] / base['peak_mb'] if base.get('peak_mb') else 1.0
+        r.update(baseline_seconds=base['seconds'], ratio=ratio,
+                 baseline_peak_mb=base.get('peak_mb'), memory_ratio=memory_ratio)
+        flags = []
+        if ratio > 1 + tolerance:
+            flags.append('temps')
+        if memory_ratio > 1 + memory_tolerance:
+            flags.append('mémoire')
+        if flags:
+            regressions.append(r)
+        flag = f"  << régression ({', '.join(flags)})" if flags else ''
+        print(f"{r['size']:>5} {r['stage']:<15} {base['seconds']:9.4f} -> {r['seconds']:9.4f} s (x{ratio:.2f}) "
+              f"{base.get('peak_mb', 0):8.1f} -> {r['peak_mb']:8.1f} Mo (x{memory_ratio:.2f}){flag}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Banc d'essai du pipeline TRANSOD")
+    parser.add_argument('--sizes', nargs='+', default=['150k', '1M'], choices=list(sizes))
+    parser.add_argument('--stages', nargs='+', choices=list(stages), help='étapes rapportées (toutes par défaut)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='résultats de référence à comparer')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='ralentissement toléré (0.2 = +20 %%)')
+    parser.add_argument('--memory-tolerance', type=float, help='hausse du pic mémoire tolérée (défaut: --tolerance)')
+    parser.add_argument('--frame-limit', type=int, default=frame_limit,
+                        help='au-delà, seules les étapes par blocs sont mesurées')
+    parser.add_argument('--child', nargs=2, metavar=('STAGE', 'CSV'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(*args.child)
+        sys.exit(0)
+
+    results = run(args.sizes, args.repeat, args.stages, args.frame_limit)
+    report = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        'results': results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.memory_tolerance)
+        report['regressions'] = [(r['stage'], r['size']) for r in regressions]
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,5 @@
+import sys
+
+from transod.cli import main
+
+sys.exit(main())
@@ -0,0 +1,61 @@
+# Auteur : Rémy Wilson
+# Programme : Ingestion de plusieurs enquêtes en parallèle et fusion des agrégats par source.
+# Date: 18 Octobre 2026
+
+import glob
+import os
+from functools import reduce
+
+from transod.incremental import aggregate_csv, copy_state, merge_states
+from transod.parallel import map_parallel
+
+
+def survey_name(path):
+    return os.path.splitext(os.path.basename(path))[0].strip('_')
+
+
+def _expand(patterns):
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(match for match in matches if match not in paths)
+    return paths
+
+
+def expand_inputs(inputs):
+    # Either a list of paths/globs, each file being its own survey, or a mapping
+    # survey -> paths/globs when several files (regions) make up one survey.
+    if isinstance(inputs, dict):
+        return [(survey, path) for survey, patterns in inputs.items() for path in _expand(patterns)]
+    return [(survey_name(path), path) for path in _expand(inputs)]
+
+
+def _aggregate_file(task):
+    path, dims, raw, chunksize = task
+    return aggregate_csv(path, dims, raw=raw, chunksize=chunksize)
+
+
+def ingest_many(inputs, dims=None, raw=True, chunksize=1_000_000, workers=None):
+    pairs = expand_inputs(inputs)
+    if not pairs:
+        raise ValueError("Aucun fichier d'entrée")
+
+    tasks = [(path, dims, raw, chunksize) for _, path in pairs]
+    states = map_parallel(_aggregate_file, tasks, workers)
+
+    by_source = {}
+    by_survey = {}
+    for (survey, path), state in zip(pairs, states):
+        state['sources'][0].update(survey=survey, path=path)
+        by_source[path] = state
+        by_survey[survey] = merge_states(by_survey[survey], state) if survey in by_survey else copy_state(state)
+
+    # Each level holds its own arrays, even for a single file or a single survey.
+    surveys = list(by_survey.values())
+    return {
+        'sources': by_source,
+        'surveys': by_survey,
+        'combined': reduce(merge_states, surveys[1:], copy_state(surveys[0])),
+    }
@@ -0,0 +1,83 @@
+# Auteur : Rémy Wilson
+# Programme : Intervalles de confiance bootstrap des statistiques sommaires par secteur.
+# Date: 18 Octobre 2026
+
+import numpy as np
+
+from transod.instrument import traced
+from transod.parallel import batch_seeds, map_parallel
+
+
+def summary_arrays(table, modes):
+    # `table` is (..., sectors, modes); every statistic is computed over the last axis
+    # so a whole stack of bootstrap replicates is handled at once.
+    table = np.asarray(table, dtype=np.float64)
+    n = table.sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = table / n[..., np.newaxis] * 100
+
+        auto = shares[..., modes.index('Auto')]
+        sustainable = shares[..., modes.index('Transport en commun')] + shares[..., modes.index('Modes actifs')]
+        ratio = np.where(sustainable > 0, auto / sustainable, np.inf)
+
+        probs = shares / 100
+        diversity = -np.where(probs > 0, probs * np.log(probs), 0.0).sum(axis=-1)
+
+    return {
+        'n': n,
+        'dominant': shares.argmax(axis=-1),
+        'dominant_share': shares.max(axis=-1),
+        'sustainable_share': sustainable,
+        'ratio': ratio,
+        'diversity': diversity,
+    }
+
+
+def _bootstrap_batch(task):
+    probs, total, cell_mean, cell_var, modes, size, seed = task
+    rng = np.random.default_rng(seed)
+    draws = rng.multinomial(total, probs.ravel(), size=size).reshape((size,) + probs.shape)
+    # The factors of the k trips drawn in a cell sum to k * mean on average, with
+    # variance k * var; the compound sum is drawn from its normal approximation.
+    noise = rng.standard_normal(draws.shape) * np.sqrt(draws * cell_var)
+    return summary_arrays(np.maximum(draws * cell_mean + noise, 0.0), modes)
+
+
+@traced('bootstrap_summary')
+def bootstrap_summary(counts, modes, totals=None, squares=None, n_boot=2000, ci=95, batch_size=250,
+                      seed=None, workers=None):
+    # Resampling trips with replacement is a multinomial draw over the cells of the
+    # sector x mode count table. With `totals` and `squares` (weighted cell totals and
+    # sums of squared factors), each cell's drawn trips carry factors with the mean and
+    # variance observed in that cell.
+    counts = np.asarray(counts, dtype=np.float64)
+    total = int(round(counts.sum()))
+    probs = counts / counts.sum()
+    if totals is None:
+        cell_mean = np.ones_like(counts)
+        cell_var = np.zeros_like(counts)
+        observed = summary_arrays(counts, modes)
+    else:
+        if squares is None:
+            raise ValueError("Le bootstrap pondéré nécessite la somme des carrés des facteurs par cellule")
+        totals = np.asarray(totals, dtype=np.float64)
+        squares = np.asarray(squares, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cell_mean = np.where(counts > 0, totals / counts, 0.0)
+            cell_var = np.where(counts > 0, np.maximum(squares / counts - cell_mean ** 2, 0.0), 0.0)
+        observed = summary_arrays(totals, modes)
+
+    tasks = [
+        (probs, total, cell_mean, cell_var, modes, size, child)
+        for size, child in batch_seeds(n_boot, batch_size, seed)
+    ]
+    batches = map_parallel(_bootstrap_batch, tasks, workers)
+    replicates = {key: np.concatenate([batch[key] for batch in batches]) for key in observed}
+
+    alpha = (100 - ci) / 2
+    intervals = {
+        key: np.percentile(values, [alpha, 100 - alpha], axis=0)
+        for key, values in replicates.items() if key != 'dominant'
+    }
+    intervals['dominant_stability'] = (replicates['dominant'] == observed['dominant']).mean(axis=0) * 100
+    return intervals
@@ -0,0 +1,133 @@
+# Auteur : Rémy Wilson
+# Programme : Cache colonnaire (.npy) en mémoire partagée des données nettoyées.
+# Date: 18 Octobre 2026
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from transod.instrument import stage
+
+column_dtypes = {
+    'originreportzone': np.int16,
+    'destreportzone': np.int16,
+    'departtime': np.int16,
+    'trippurpose': np.int16,
+    'modeprimary': np.uint8,
+}
+# Only the integer codes are narrowed: tripfactor stays float64 so that weighted
+# totals read from the cache match the CSV path exactly. Bump the format when
+# the stored dtypes change, so that older caches are rebuilt.
+cache_format = 2
+
+
+def cache_dir(csv_path):
+    root, _ = os.path.splitext(csv_path)
+    return root + '.npycache'
+
+
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_stamp(csv_path):
+    st = os.stat(csv_path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _compact(values, dtype):
+    # Values that do not fit the compact dtype keep their parsed dtype
+    # rather than silently wrapping around.
+    if np.issubdtype(dtype, np.integer):
+        if values.dtype.kind not in 'iu':
+            return values
+        info = np.iinfo(dtype)
+        if len(values) and (values.min() < info.min or values.max() > info.max):
+            return values
+    return values.astype(dtype)
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(directory, meta):
+    tmp = os.path.join(directory, 'meta.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(directory, 'meta.json'))
+
+
+def is_fresh(csv_path):
+    directory = cache_dir(csv_path)
+    meta = _read_meta(directory)
+    if meta is None or meta.get('format') != cache_format:
+        return False
+
+    stamp = _source_stamp(csv_path)
+    if meta['size'] == stamp['size'] and meta['mtime_ns'] == stamp['mtime_ns']:
+        return True
+    if meta['size'] != stamp['size']:
+        return False
+
+    # Same size but touched: only the content hash can tell.
+    if meta['sha1'] != file_hash(csv_path):
+        return False
+    meta.update(stamp)
+    _write_meta(directory, meta)
+    return True
+
+
+def build_cache(csv_path):
+    directory = cache_dir(csv_path)
+    stamp = _source_stamp(csv_path)
+    df = pd.read_csv(csv_path)
+
+    parent = os.path.dirname(os.path.abspath(directory))
+    tmp_dir = tempfile.mkdtemp(prefix='.npycache-', dir=parent)
+    columns = []
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if column in column_dtypes:
+            values = _compact(values, column_dtypes[column])
+        if values.dtype == object:
+            continue
+        np.save(os.path.join(tmp_dir, f'{column}.npy'), values)
+        columns.append(column)
+
+    meta = dict(stamp, format=cache_format, sha1=file_hash(csv_path), columns=columns, rows=len(df))
+    _write_meta(tmp_dir, meta)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+    return directory
+
+
+def load_trips(csv_path, columns=None):
+    with stage('load_trips', source=csv_path) as record:
+        record['cache_hit'] = is_fresh(csv_path)
+        if not record['cache_hit']:
+            build_cache(csv_path)
+
+        directory = cache_dir(csv_path)
+        meta = _read_meta(directory)
+        columns = columns or meta['columns']
+        data = {
+            column: np.load(os.path.join(directory, f'{column}.npy'), mmap_mode='r')
+            for column in columns
+        }
+        record['rows_out'] = meta['rows']
+        return pd.DataFrame(data, copy=False)
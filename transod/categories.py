@@ -0,0 +1,76 @@
+# Auteur : Rémy Wilson
+# Programme : Classifications des zones, modes et motifs compilées en tables de correspondance.
+# Date: 18 Octobre 2026
+
+import numpy as np
+import pandas as pd
+
+from transod.codes import dense_index
+
+zones_dict = {
+    1: 'Ottawa Centre', 50: 'Ottawa Inner Area', 100: 'Ottawa East',
+    120: 'Beacon Hill', 140: 'Alta Vista', 180: 'Hunt Club',
+    200: 'Merivale', 240: 'Ottawa West', 260: 'Bayshore/Cedarview',
+    300: 'Orleans', 350: 'Rural East', 360: 'Rural Southeast',
+    400: 'South Gloucester/Letrim', 425: 'South Nepean', 450: 'Rural Southwest',
+    500: 'Kanata/Stittsville', 560: 'Rural West', 600: 'Île de Hull',
+    625: 'Hull Périphérie', 650: 'Plateau', 700: 'Aylmer',
+    750: 'Rural Northwest', 800: 'Gatineau Centre', 820: 'Gatineau Est',
+    840: 'Rural Northeast', 845: 'Masson-Angers'
+}
+
+sector_classification = {
+    'Centre-ville': [1, 50, 100, 240, 600, 800],
+    'Banlieue intérieure': [120, 140, 180, 200, 260, 625, 650, 700, 820],
+    'Banlieue extérieure': [300, 400, 425, 500, 350, 360, 450, 560, 750, 840, 845]
+}
+
+mode_categories = {
+    'Auto': [1, 2],
+    'Transport en commun': [3, 4, 5],
+    'Modes actifs': [6, 7, 14, 15],
+    'Autres': [8, 9, 10, 11, 13, 16, 18, 21, 22, 23, 24, 77]
+}
+
+purpose_map = {
+    'Travail': [10, 11, 12],
+    'Études': [20, 30],
+    'Achats': [40, 41],
+    'Loisirs': [44, 45, 46],
+    'Retour': [80],
+    'Passagers': [51, 52],
+    'Autre': [43, 777, 888]
+}
+
+
+def compile_mapping(mapping, default=None):
+    labels = list(mapping)
+    if default is not None and default not in labels:
+        labels.append(default)
+    fill = labels.index(default) if default is not None else -1
+
+    size = max(code for codes in mapping.values() for code in codes) + 1
+    table = np.full(size, fill, dtype=np.int16)
+    # Reversed so that, as with the old per-row loops, the first category listing a code wins.
+    for i, codes in reversed(list(enumerate(mapping.values()))):
+        table[list(codes)] = i
+
+    return {'labels': labels, 'table': table, 'fill': fill}
+
+
+def lookup_codes(lookup, values):
+    table = lookup['table']
+    index = dense_index(values, len(table))
+    codes = np.full(len(index), lookup['fill'], dtype=np.int16)
+    inside = index >= 0
+    codes[inside] = table[index[inside]]
+    return codes
+
+
+def lookup_categorical(lookup, values):
+    return pd.Categorical.from_codes(lookup_codes(lookup, values), categories=lookup['labels'])
+
+
+sector_lookup = compile_mapping(sector_classification, default='Autre')
+mode_lookup = compile_mapping(mode_categories, default='Autres')
+purpose_lookup = compile_mapping(purpose_map, default='Autre')
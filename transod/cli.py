@@ -0,0 +1,355 @@
+# Auteur : Rémy Wilson
+# Programme : Point d'entrée en ligne de commande pour les tableaux et figures des questions 1 à 3.
+# Date: 18 Octobre 2026
+
+# Only the standard library is imported here: numpy, pandas, scipy and the plotting
+# libraries are loaded by the subcommand that needs them.
+import argparse
+import importlib.util
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+default_data = os.path.join(repo_root, '_CLEANDATA_.csv')
+raw_data = os.path.join(repo_root, 'Filtering', '_TRANSOD2022.csv')
+
+scripts = {
+    'q1_tableau': 'Question 1/Q1_tableau.py',
+    'q1_chi2': 'Question 1/Q1_chi-square.py',
+    'q1_graphiques': 'Question 1/Q1_graphiques.py',
+    'q2_chi2': 'Question 2/Q2_chisquare.py',
+    'q2_heatmap': 'Question 2/Q2_heatmap.py',
+    'q2_linegraph': 'Question 2/Q2_linegraph.py',
+    'q2_sankey': 'Question 2/Q2_sankey.py',
+    'q3_correlation': 'Question 3/Q3_corrélation.py',
+}
+
+
+def load_script(name):
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(repo_root, scripts[name]))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _data(args):
+    return _load(args.data)
+
+
+def _load(path):
+    from transod.incremental import load_data
+    if path.endswith('.npz'):
+        return load_data(state_path=path)
+    return load_data(path)
+
+
+def _weights(args):
+    from transod.cube import weight_col
+    return None if args.unweighted else weight_col
+
+
+def table_q1(args):
+    q1 = load_script('q1_tableau')
+    tables = q1.create_comprehensive_table(_data(args), weights=_weights(args), n_boot=args.boot, seed=args.seed)
+    return {q1.sheet_titles[key]: table for key, table in tables.items()}
+
+
+def table_q1_chi2(args):
+    from transod.permutation import permutation_test
+
+    observed, residuals, results = load_script('q1_chi2').compute_residuals(_data(args))
+    mc = permutation_test(observed.values, n_resamples=args.resamples, seed=args.seed)
+    print(f"V de Cramér: {results['cramers_v']:.4f}")
+    print(f"p (asymptotique): {mc['p_asymptotic']:.4g}")
+    print(f"p (Monte Carlo, {mc['n_resamples']} permutations): {mc['p_value']:.4g} ± {mc['p_se']:.2g}")
+    return {'observed': observed, 'residuals': residuals}
+
+
+def table_q2_chi2(args):
+    import pandas as pd
+
+    resid_dict, stats, max_abs = load_script('q2_chi2').period_residuals(_data(args))
+    summary = pd.DataFrame(stats, index=['chi2', 'p', 'dof', 'n']).T
+    tables = {'stats': summary}
+    tables.update({period: residuals for period, residuals in resid_dict.items() if residuals is not None})
+    return tables
+
+
+def table_q2_heatmap(args):
+    return load_script('q2_heatmap').prepare_heatmaps(_data(args), weights=_weights(args))
+
+
+def table_q3(args):
+    return {'zones': load_script('q3_correlation').build_analysis_df(_data(args), weights=_weights(args))}
+
+
+# Each figure is (script, plotting function, inputs): the inputs function computes the
+# aggregates the plot needs, so rendering never goes back to the trip table.
+def figure_q1_bars(data, weights):
+    q1 = load_script('q1_graphiques')
+    return {'crosstab_df': q1.prepare_crosstab(q1.apply_classification(data, weights=weights))}
+
+
+def figure_q1_residuals(data, weights):
+    return {'residuals': load_script('q1_chi2').compute_residuals(data)[1]}
+
+
+def figure_q2_heatmap(data, weights):
+    return {'heatmaps': load_script('q2_heatmap').prepare_heatmaps(data, weights=weights)}
+
+
+def figure_q2_residuals(data, weights):
+    resid_dict, stats, max_abs = load_script('q2_chi2').period_residuals(data)
+    return {'resid_dict': resid_dict, 'max_abs': max_abs}
+
+
+def figure_q2_lines(data, weights):
+    return {'cube': load_script('q2_linegraph').prepare_data(data, weights=weights)}
+
+
+def figure_q2_sankey(data, weights):
+    return {'flows': load_script('q2_sankey').sankey_flows(data, weights=weights)}
+
+
+def figure_q2_sankey_sectors(data, weights):
+    q2 = load_script('q2_sankey')
+    return {'flows': q2.sankey_flows(data, weights=weights, stages=['origin_sector'] + q2.default_stages)}
+
+
+def figure_q3(data, weights):
+    from transod.correlation import pairwise_stats
+
+    q3 = load_script('q3_correlation')
+    analysis_df = q3.build_analysis_df(data, weights=weights)
+    return {'analysis_df': analysis_df, 'pair_table': pairwise_stats(analysis_df, q3.num_vars, group='Secteur')}
+
+
+tables = {
+    'q1': table_q1,
+    'q1-chi2': table_q1_chi2,
+    'q2-chi2': table_q2_chi2,
+    'q2-heatmap': table_q2_heatmap,
+    'q3': table_q3,
+}
+
+figures = {
+    'q1-bars': ('q1_graphiques', 'plot_from_crosstab', figure_q1_bars),
+    'q1-residuals': ('q1_chi2', 'plot_residuals', figure_q1_residuals),
+    'q2-heatmap': ('q2_heatmap', 'plot_heatmaps', figure_q2_heatmap),
+    'q2-residuals': ('q2_chi2', 'plot_period_residuals', figure_q2_residuals),
+    'q2-profiles': ('q2_linegraph', 'plot_profiles', figure_q2_lines),
+    'q2-hourly': ('q2_linegraph', 'plot_hourly', figure_q2_lines),
+    'q2-sankey': ('q2_sankey', 'plot_sankey', figure_q2_sankey),
+    'q2-sankey-sectors': ('q2_sankey', 'plot_sankey', figure_q2_sankey_sectors),
+    'q3-scatter': ('q3_correlation', 'scatterplot', figure_q3),
+    'q3-matrix': ('q3_correlation', 'plot_correlation_matrix', figure_q3),
+}
+
+
+def figure_inputs(names, data, weights):
+    # Figures sharing an inputs function (q2 lines, q3) compute it once.
+    computed = {}
+    for name in names:
+        inputs = figures[name][2]
+        if inputs not in computed:
+            computed[inputs] = inputs(data, weights)
+    return {name: computed[figures[name][2]] for name in names}
+
+
+def show_figures(args):
+    from transod.render import show
+
+    inputs = figure_inputs(args.names, _data(args), _weights(args))
+    results = []
+    for name in args.names:
+        script, function, _ = figures[name]
+        results.append(getattr(load_script(script), function)(**inputs[name]))
+    show(results)
+
+
+def render_figures(args):
+    from transod.batch import survey_name
+    from transod.cube import weight_col
+    from transod.render import render_all
+
+    names = args.names or list(figures)
+    jobs = []
+    out_dirs = []
+    for path in args.data:
+        inputs = figure_inputs(names, _load(path), None if args.unweighted else weight_col)
+        out_dir = args.out
+        if len(args.data) > 1:
+            out_dir = os.path.join(args.out, survey_name(path))
+            out_dir += f'_{len(out_dirs) + 1}' if out_dir in out_dirs else ''
+        out_dirs.append(out_dir)
+        for name in names:
+            script, function, _ = figures[name]
+            jobs.append((script, function, inputs[name], os.path.join(out_dir, name), args.format))
+
+    for path in render_all(jobs, args.workers):
+        print(path)
+
+
+def write_tables(result, output=None, formats=None):
+    if output is None:
+        for name, table in result.items():
+            print(f'\n== {name} ==')
+            print(table.to_string())
+        return
+
+    from transod.export import export_tables
+    for path in export_tables(result, output, formats):
+        print(path)
+
+
+def synthesize(args):
+    import pandas as pd
+
+    from transod.synth import check_model, fit_model, generate_csv, load_model, save_model
+
+    if args.model and os.path.exists(args.model):
+        model = load_model(args.model)
+    else:
+        data = pd.read_csv(args.data)
+        model = fit_model(data, time_bin=args.time_bin)
+        # Origin x mode and origin x purpose shares of a sample, against the data.
+        print(check_model(model, data, seed=args.seed).to_string(index=False))
+        if args.model:
+            save_model(model, args.model)
+    print(generate_csv(model, args.rows, args.output, chunk_rows=args.chunk, seed=args.seed,
+                       workers=args.workers))
+
+
+def validate(args):
+    import json
+
+    from transod.validation import print_validation_report, validate_csv
+
+    _, report = validate_csv(args.data, chunksize=args.chunk, mask_path=args.mask)
+    print_validation_report(report)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+
+
+def od_tables(args):
+    from transod.od import build_od, intrazonal_share, save_od, sector_rollup, top_flows
+
+    od = build_od(_data(args), args.by, _weights(args), zones='observed' if args.zones == 'observed' else None)
+    # --where period='Matin pointe' mode_category=Auto; labels are matched as text.
+    where = {}
+    for item in args.where or []:
+        dim, _, value = item.partition('=')
+        if dim not in od['dims']:
+            raise SystemExit(f"Dimension inconnue: {dim} (choix: {', '.join(od['dims'])})")
+        labels = {str(label): label for label in od['labels'][dim]}
+        if value not in labels:
+            raise SystemExit(f"Valeur inconnue pour {dim}: {value} (choix: {', '.join(labels)})")
+        where.setdefault(dim, []).append(labels[value])
+
+    if args.output:
+        print(save_od(od, args.output))
+    print(f"Part intrazonale: {intrazonal_share(od, **where):.4f}")
+    return {
+        'Principaux flux': top_flows(od, args.top, intrazonal=not args.interzonal, **where),
+        'Secteurs': sector_rollup(od, **where),
+        'Part intrazonale': intrazonal_share(od, by_origin=True, **where).to_frame(),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='transod', description='Analyses TRANSOD 2022 (questions 1 à 3).')
+    parser.add_argument('--trace', metavar='FICHIER', help='écrit les mesures par étape (temps, lignes, mémoire) en JSON')
+    parser.add_argument('--trace-summary', action='store_true', help='affiche les mesures par étape sur stderr')
+    parser.add_argument('--profile', metavar='ETAPE[:sampling]',
+                        help='profile une étape avec cProfile, ou par échantillonnage avec :sampling')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--data', default=default_data, help='CSV nettoyé ou état agrégé .npz')
+    common.add_argument('--unweighted', action='store_true', help='comptes échantillonnaux au lieu des totaux pondérés')
+    common.add_argument('--seed', type=int, default=2022)
+
+    table = commands.add_parser('table', parents=[common], help='calcule un tableau')
+    table.add_argument('name', choices=list(tables))
+    table.add_argument('--output', help='fichier de sortie; le format suit l\'extension (.xlsx, .csv, .parquet, .feather, .json)')
+    table.add_argument('--format', nargs='+', choices=['xlsx', 'csv', 'parquet', 'feather', 'json'],
+                       help='plusieurs formats pour la même sortie')
+    table.add_argument('--boot', type=int, default=2000, help='rééchantillons bootstrap (q1)')
+    table.add_argument('--resamples', type=int, default=20000, help='permutations Monte Carlo (q1-chi2)')
+
+    figure = commands.add_parser('figure', parents=[common], help='affiche des figures')
+    figure.add_argument('names', nargs='+', choices=list(figures), metavar='name')
+
+    render = commands.add_parser('render', help='écrit des figures dans des fichiers, sans affichage')
+    render.add_argument('names', nargs='*', metavar='name', help='toutes par défaut')
+    render.add_argument('--data', action='append', help='CSV ou .npz, répétable pour plusieurs enquêtes')
+    render.add_argument('--unweighted', action='store_true')
+    render.add_argument('--out', default='figures')
+    render.add_argument('--format', nargs='+', default=['png'], choices=['png', 'svg', 'pdf', 'html'])
+    render.add_argument('--workers', type=int)
+
+    synth = commands.add_parser('synth', help='génère un fichier synthétique au format _TRANSOD2022.csv')
+    synth.add_argument('rows', type=int)
+    synth.add_argument('output')
+    synth.add_argument('--data', default=default_data, help='CSV dont la distribution conjointe est reproduite')
+    synth.add_argument('--model', help='modèle ajusté (.npz), réutilisé s\'il existe, sinon enregistré')
+    synth.add_argument('--seed', type=int, default=2022)
+    synth.add_argument('--chunk', type=int, default=1_000_000, help='lignes par lot')
+    synth.add_argument('--workers', type=int)
+    synth.add_argument('--time-bin', type=int, default=15, help='largeur des intervalles d\'heures de départ (minutes)')
+
+    od = commands.add_parser('od', parents=[common], help='matrices origine-destination par tranche')
+    od.add_argument('--by', nargs='+', default=['mode_category', 'purpose', 'period'],
+                    choices=['mode_category', 'mode', 'purpose', 'period', 'hour'], help='dimensions des tranches')
+    od.add_argument('--where', nargs='+', metavar='DIM=VALEUR', help='tranches retenues, par ex. period=Soir')
+    od.add_argument('--zones', choices=['report', 'observed'], default='report',
+                    help='zones de rapport, ou tous les codes présents dans les données')
+    od.add_argument('--top', type=int, default=10, help='nombre de flux affichés')
+    od.add_argument('--interzonal', action='store_true', help='exclut les flux intrazonaux du classement')
+    od.add_argument('--output', help='enregistre toutes les matrices en .npz compressé')
+    od.add_argument('--tables', help='fichier des tableaux (.xlsx, .csv, ...)')
+
+    check = commands.add_parser('validate', help='valide un fichier brut en une passe et affiche le rapport')
+    check.add_argument('data', nargs='?', default=raw_data, help='CSV brut au format _TRANSOD2022.csv')
+    check.add_argument('--mask', help='enregistre le masque des lignes valides (.npy)')
+    check.add_argument('--report', help='enregistre le rapport en JSON')
+    check.add_argument('--chunk', type=int, default=1_000_000, help='lignes par lot')
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    from transod import instrument
+    if args.profile:
+        # Also exported, so that spawned workers profile the same stage.
+        instrument.profile_spec = os.environ['TRANSOD_PROFILE'] = args.profile
+    try:
+        if args.command == 'table':
+            write_tables(tables[args.name](args), args.output, args.format)
+        elif args.command == 'figure':
+            show_figures(args)
+        elif args.command == 'synth':
+            synthesize(args)
+        elif args.command == 'validate':
+            validate(args)
+        elif args.command == 'od':
+            write_tables(od_tables(args), args.tables)
+        else:
+            unknown = [name for name in args.names if name not in figures]
+            if unknown:
+                parser.error(f"figures inconnues: {', '.join(unknown)} (choix: {', '.join(figures)})")
+            args.data = args.data or [default_data]
+            render_figures(args)
+    finally:
+        # Written even when a stage fails: its record carries the error.
+        if args.trace:
+            instrument.write_trace(args.trace, {'command': args.command})
+        if args.trace_summary:
+            instrument.print_summary()
+    return 0
@@ -0,0 +1,37 @@
+# Auteur : Rémy Wilson
+# Programme : Tables de correspondance denses pour les codes entiers du TRANSOD.
+# Date: 18 Octobre 2026
+
+import numpy as np
+import pandas as pd
+
+
+def dense_index(values, size):
+    # Codes as positions in a dense table of length `size`; anything missing,
+    # non-integer or out of range becomes -1.
+    values = np.asarray(values).ravel()
+    if values.dtype.kind in 'iu':
+        ok = (values >= 0) & (values < size)
+        return np.where(ok, values, -1).astype(np.int64)
+
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    index = np.full(len(values), -1, dtype=np.int64)
+    ok = np.isfinite(values) & (values >= 0) & (values < size) & (values == np.floor(values))
+    index[ok] = values[ok].astype(np.int64)
+    return index
+
+
+def membership_table(codes):
+    codes = np.asarray(list(codes), dtype=np.int64)
+    table = np.zeros(int(codes.max()) + 1, dtype=bool)
+    table[codes] = True
+    return table
+
+
+def membership_mask(values, codes):
+    table = membership_table(codes)
+    index = dense_index(values, len(table))
+    mask = np.zeros(len(index), dtype=bool)
+    inside = index >= 0
+    mask[inside] = table[index[inside]]
+    return mask
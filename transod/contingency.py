@@ -0,0 +1,65 @@
+# Auteur : Rémy Wilson
+# Programme : Tests du chi-carré, résidus et V de Cramér sur des piles de tableaux de contingence.
+# Date: 18 Octobre 2026
+
+import numpy as np
+
+from transod.instrument import traced
+
+
+@traced('chi2_batch')
+def chi2_batch(tables, correction=True):
+    # `tables` is strata x rows x cols (a single 2D table is accepted too). Rows or
+    # columns that are empty within a stratum do not count towards its dof, which
+    # matches running chi2_contingency on that stratum's own crosstab.
+    from scipy.stats import chi2 as chi2_dist
+
+    observed = np.asarray(tables, dtype=np.float64)
+    single = observed.ndim == 2
+    if single:
+        observed = observed[np.newaxis]
+
+    n = observed.sum(axis=(1, 2))
+    row_totals = observed.sum(axis=2)
+    col_totals = observed.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = row_totals[:, :, None] * col_totals[:, None, :] / n[:, None, None]
+
+    n_rows = (row_totals > 0).sum(axis=1)
+    n_cols = (col_totals > 0).sum(axis=1)
+    dof = np.maximum(n_rows - 1, 0) * np.maximum(n_cols - 1, 0)
+
+    cells = expected > 0
+    diff = np.where(cells, observed - expected, 0.0)
+    if correction:
+        # Yates' continuity correction, applied like scipy only when dof == 1.
+        yates = (dof == 1)[:, None, None]
+        diff = np.where(yates, np.sign(diff) * np.maximum(np.abs(diff) - 0.5, 0.0), diff)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi2 = np.where(cells, diff ** 2 / expected, 0.0).sum(axis=(1, 2))
+        p_values = np.where(dof > 0, chi2_dist.sf(chi2, np.maximum(dof, 1)), 1.0)
+
+        raw = observed - expected
+        residuals = np.where(cells, raw / np.sqrt(expected), np.nan)
+        row_share = row_totals / n[:, None]
+        col_share = col_totals / n[:, None]
+        variance = expected * (1 - row_share[:, :, None]) * (1 - col_share[:, None, :])
+        adjusted = np.where(variance > 0, raw / np.sqrt(variance), np.nan)
+
+        k = np.minimum(n_rows, n_cols) - 1
+        cramers_v = np.where(k > 0, np.sqrt(chi2 / (n * k)), np.nan)
+
+    results = {
+        'chi2': chi2,
+        'p': p_values,
+        'dof': dof,
+        'n': n,
+        'expected': expected,
+        'residuals': residuals,
+        'adjusted_residuals': adjusted,
+        'cramers_v': cramers_v,
+    }
+    if single:
+        results = {key: value[0] for key, value in results.items()}
+    return results
@@ -0,0 +1,80 @@
+# Auteur : Rémy Wilson
+# Programme : Corrélations et régressions simples pour toutes les paires de variables, par groupe.
+# Date: 18 Octobre 2026
+
+import numpy as np
+
+from transod.instrument import traced
+
+global_group = 'Global'
+
+
+@traced('pairwise_stats')
+def pairwise_stats(df, variables, group=None, weights=None):
+    # Every statistic is groups x variables x variables, with [g, i, j] describing
+    # the regression of variables[i] (y) on variables[j] (x), i.e. the PairGrid cell
+    # at row i, column j. The first group is always the whole table.
+    from scipy.stats import t as t_dist
+
+    values = df[variables].to_numpy(dtype=np.float64)
+    w = np.ones(len(df)) if weights is None else np.asarray(
+        df[weights] if isinstance(weights, str) else weights, dtype=np.float64)
+
+    # Rows with a missing value in any variable are left out everywhere.
+    complete = np.isfinite(values).all(axis=1) & np.isfinite(w)
+    values, w = values[complete], w[complete]
+
+    groups = [global_group]
+    members = np.ones((1, len(values)))
+    if group is not None:
+        labels = df[group].to_numpy()[complete]
+        levels = list(dict.fromkeys(labels.tolist()))
+        groups += levels
+        members = np.vstack([members, np.array([labels == level for level in levels], dtype=np.float64)])
+
+    gw = members * w
+    n = members.sum(axis=1)
+    total = gw.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = gw @ values / total[:, None]
+    centered = values[None, :, :] - means[:, None, :]
+    cross = np.einsum('gk,gki,gkj->gij', gw, centered, centered)
+    var = np.diagonal(cross, axis1=1, axis2=2)
+
+    dof = n - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.clip(cross / np.sqrt(var[:, :, None] * var[:, None, :]), -1.0, 1.0)
+        slope = cross / var[:, None, :]
+        intercept = means[:, :, None] - slope * means[:, None, :]
+        residual = var[:, :, None] * (1 - r ** 2) / dof[:, None, None]
+        se_slope = np.sqrt(residual / var[:, None, :])
+        se_intercept = np.sqrt(residual * (1 / total[:, None, None] + means[:, None, :] ** 2 / var[:, None, :]))
+        t = r * np.sqrt(dof[:, None, None] / (1 - r ** 2))
+        p = np.where(dof[:, None, None] > 0, 2 * t_dist.sf(np.abs(t), np.maximum(dof, 1)[:, None, None]), np.nan)
+
+    return {
+        'variables': list(variables),
+        'groups': groups,
+        'n': n,
+        'r': r,
+        'p': p,
+        'slope': slope,
+        'intercept': intercept,
+        'r2': r ** 2,
+        'se_slope': se_slope,
+        'se_intercept': se_intercept,
+    }
+
+
+def pair(stats, y, x, group=global_group):
+    g = stats['groups'].index(group)
+    i = stats['variables'].index(y)
+    j = stats['variables'].index(x)
+    keys = ['r', 'p', 'slope', 'intercept', 'r2', 'se_slope', 'se_intercept']
+    result = {key: float(stats[key][g, i, j]) for key in keys}
+    result['n'] = int(stats['n'][g])
+    return result
+
+
+def significance(p):
+    return "***" if p < 0.001 else "**" if p < 0.01 else "*" if p < 0.05 else ""
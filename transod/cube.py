@@ -0,0 +1,223 @@
+# Auteur : Rémy Wilson
+# Programme : Cube de comptes (origine x destination x heure x motif x mode) construit en une passe.
+# Date: 18 Octobre 2026
+
+import numpy as np
+import pandas as pd
+
+from transod.categories import lookup_codes, purpose_lookup, zones_dict
+from transod.codes import dense_index
+from transod.filtering import valid_modes
+from transod.instrument import stage, traced
+from transod.timebins import bin_departures, compile_periods, time_periods
+
+default_dims = ['origin', 'dest', 'hour', 'purpose', 'mode']
+weight_col = 'tripfactor'
+
+
+def _code_table(codes):
+    table = np.full(max(codes) + 1, -1, dtype=np.int64)
+    table[list(codes)] = np.arange(len(codes))
+    return table
+
+
+_zone_table = _code_table(list(zones_dict))
+_mode_table = _code_table(valid_modes)
+
+
+def _table_codes(table, values):
+    index = dense_index(values, len(table))
+    return np.where(index >= 0, table[np.maximum(index, 0)], -1)
+
+
+def _origin(df):
+    return _table_codes(_zone_table, df['originreportzone']), list(zones_dict)
+
+
+def _dest(df):
+    return _table_codes(_zone_table, df['destreportzone']), list(zones_dict)
+
+
+def _hour(df):
+    return bin_departures(df['departtime'])['service_hour'], list(range(30))
+
+
+def _period(df):
+    return bin_departures(df['departtime'])['period'].codes, list(time_periods)
+
+
+def _purpose(df):
+    return lookup_codes(purpose_lookup, df['trippurpose']), list(purpose_lookup['labels'])
+
+
+def _mode(df):
+    return _table_codes(_mode_table, df['modeprimary']), list(valid_modes)
+
+
+cube_dimensions = {
+    'origin': _origin,
+    'dest': _dest,
+    'hour': _hour,
+    'period': _period,
+    'purpose': _purpose,
+    'mode': _mode,
+}
+
+
+def _weight_values(df, weights, keep):
+    weights = df[weights] if isinstance(weights, str) else weights
+    return np.asarray(weights, dtype=np.float64)[keep]
+
+
+def build_cube(df, dims=None, weights=None, totals=None):
+    # `weights` is a column name (usually weight_col) or an array; weighted cells hold
+    # expanded trip totals instead of sample counts. `totals` adds those weighted cells
+    # as a second array next to the sample counts, from the same pass.
+    dims = list(dims or default_dims)
+    with stage('build_cube', rows_in=len(df), dims=dims) as record:
+        axes = [cube_dimensions[dim](df) for dim in dims]
+        shape = tuple(len(labels) for _, labels in axes)
+
+        # Rows falling outside any axis (unknown zone, invalid time, ...) are left out.
+        keep = np.ones(len(df), dtype=bool)
+        for codes, _ in axes:
+            keep &= codes >= 0
+        flat = np.ravel_multi_index([codes[keep] for codes, _ in axes], shape)
+        size = int(np.prod(shape))
+        if weights is not None:
+            weights = _weight_values(df, weights, keep)
+        counts = np.bincount(flat, weights=weights, minlength=size).reshape(shape)
+
+        cube = {
+            'dims': dims,
+            'labels': {dim: labels for dim, (_, labels) in zip(dims, axes)},
+            'counts': counts,
+        }
+        if totals is not None:
+            # The sum of squared factors per cell comes with the totals: the bootstrap
+            # needs the spread of the factors within each cell, not only their mean.
+            factors = _weight_values(df, totals, keep)
+            cube['totals'] = np.bincount(flat, weights=factors, minlength=size).reshape(shape)
+            cube['squares'] = np.bincount(flat, weights=factors ** 2, minlength=size).reshape(shape)
+        record['rows_out'] = len(flat)
+        return cube
+
+
+def as_cube(data, dims, weights=None):
+    # Trip tables are aggregated here; cubes (including saved states, which also carry
+    # weighted 'totals') are reduced to `dims`.
+    if not isinstance(data, dict):
+        return build_cube(data, dims, weights=weights)
+    if weights is not None and 'totals' in data:
+        data = dict(data, counts=data['totals'])
+    return marginal(data, dims)
+
+
+def add_cubes(a, b):
+    if a['dims'] != b['dims'] or a['labels'] != b['labels']:
+        raise ValueError("Les cubes n'ont pas les mêmes dimensions")
+    merged = dict(a, counts=a['counts'] + b['counts'])
+    if 'totals' in a and 'totals' in b:
+        merged['totals'] = a['totals'] + b['totals']
+    if 'squares' in a and 'squares' in b:
+        merged['squares'] = a['squares'] + b['squares']
+    else:
+        merged.pop('squares', None)
+    return merged
+
+
+def marginal(cube, dims):
+    dims = list(dims)
+    others = tuple(i for i, dim in enumerate(cube['dims']) if dim not in dims)
+    counts = cube['counts'].sum(axis=others)
+    kept = [dim for dim in cube['dims'] if dim in dims]
+    counts = np.transpose(counts, [kept.index(dim) for dim in dims])
+    return {
+        'dims': dims,
+        'labels': {dim: cube['labels'][dim] for dim in dims},
+        'counts': counts,
+    }
+
+
+def select(cube, dim, labels):
+    axis = cube['dims'].index(dim)
+    current = cube['labels'][dim]
+    labels = [label for label in labels if label in current]
+    counts = np.take(cube['counts'], [current.index(label) for label in labels], axis=axis)
+    return {
+        'dims': list(cube['dims']),
+        'labels': dict(cube['labels'], **{dim: labels}),
+        'counts': counts,
+    }
+
+
+@traced('rollup')
+def rollup(cube, dim, groups, name=None):
+    # Sums the labels of `dim` into the keys of `groups`; labels listed in no group are dropped.
+    name = name or dim
+    axis = cube['dims'].index(dim)
+    labels = cube['labels'][dim]
+    new_labels = list(groups)
+
+    onehot = np.zeros((len(labels), len(new_labels)), dtype=cube['counts'].dtype)
+    position = {label: i for i, label in enumerate(labels)}
+    for j, members in enumerate(groups.values()):
+        for member in members:
+            if member in position:
+                onehot[position[member], j] = 1
+
+    counts = np.moveaxis(np.tensordot(cube['counts'], onehot, axes=([axis], [0])), -1, axis)
+    dims = list(cube['dims'])
+    dims[axis] = name
+    new = {d: l for d, l in cube['labels'].items() if d != dim}
+    new[name] = new_labels
+    return {
+        'dims': dims,
+        'labels': {d: new[d] for d in dims},
+        'counts': counts,
+    }
+
+
+def hour_groups(periods=None):
+    compiled = compile_periods(periods)
+    if (compiled['edges'] % 60).any():
+        raise ValueError("Les bornes des périodes doivent tomber sur l'heure pour un cube horaire")
+
+    codes = compiled['codes'][np.searchsorted(compiled['edges'], np.arange(30) * 60, side='right')]
+    return {
+        label: [hour for hour in range(30) if codes[hour] == i]
+        for i, label in enumerate(compiled['labels'])
+    }
+
+
+def to_series(cube, name='count'):
+    if len(cube['dims']) == 1:
+        index = pd.Index(cube['labels'][cube['dims'][0]], name=cube['dims'][0])
+    else:
+        index = pd.MultiIndex.from_product([cube['labels'][dim] for dim in cube['dims']], names=cube['dims'])
+    return pd.Series(cube['counts'].ravel(), index=index, name=name)
+
+
+def crosstab(cube, row, col, normalize=False, margins=False, margins_name='All'):
+    table = marginal(cube, [row, col])
+    counts = table['counts']
+
+    # Like pd.crosstab, categories that were never observed are not reported.
+    rows = counts.sum(axis=1) != 0
+    cols = counts.sum(axis=0) != 0
+    counts = counts[rows][:, cols]
+    index = pd.Index([l for l, k in zip(table['labels'][row], rows) if k], name=row)
+    columns = pd.Index([l for l, k in zip(table['labels'][col], cols) if k], name=col)
+
+    if normalize in (True, 'all'):
+        counts = counts / counts.sum()
+    elif normalize == 'index':
+        counts = counts / counts.sum(axis=1, keepdims=True)
+    elif normalize == 'columns':
+        counts = counts / counts.sum(axis=0, keepdims=True)
+
+    result = pd.DataFrame(counts, index=index, columns=columns)
+    if margins:
+        result[margins_name] = result.sum(axis=1)
+        result.loc[margins_name] = result.sum(axis=0)
+    return result
@@ -0,0 +1,92 @@
+# Auteur : Rémy Wilson
+# Programme : Matrice des distances zone × zone (haversine) et distance par déplacement.
+# Date: 18 Octobre 2026
+
+from functools import lru_cache
+
+import numpy as np
+
+from transod.codes import dense_index
+
+earth_radius_km = 6371.0
+
+# Approximate centroid (lat, lon) of each reporting zone.
+zone_coords = {
+    1: (45.4215, -75.6972), 50: (45.4050, -75.6800), 100: (45.4350, -75.6500),
+    120: (45.3900, -75.6700), 140: (45.3850, -75.6600), 180: (45.3650, -75.6700),
+    200: (45.3700, -75.7200), 240: (45.3800, -75.7400), 260: (45.3500, -75.7600),
+    300: (45.4700, -75.5200), 350: (45.5200, -75.5500), 360: (45.3200, -75.5800),
+    400: (45.3500, -75.5500), 425: (45.3000, -75.7000), 450: (45.2500, -75.7500),
+    500: (45.3500, -75.9000), 560: (45.4000, -75.9500), 600: (45.4300, -75.7100),
+    625: (45.4500, -75.7500), 650: (45.4800, -75.7300), 700: (45.4000, -75.8500),
+    750: (45.5500, -75.9000), 800: (45.4650, -75.7200), 820: (45.4800, -75.6800),
+    840: (45.5500, -75.6000), 845: (45.6000, -75.5500)
+}
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return earth_radius_km * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def compile_distances(coords=None, dtype=np.float64):
+    # float32 halves the matrix for fine zone systems (thousands of zones).
+    coords = zone_coords if coords is None else coords
+    zones = sorted(coords)
+    lat, lon = np.array([coords[zone] for zone in zones], dtype=np.float64).T
+
+    table = np.full(max(zones) + 1, -1, dtype=np.int64)
+    table[zones] = np.arange(len(zones))
+
+    matrix = haversine(lat[:, None], lon[:, None], lat[None, :], lon[None, :]).astype(dtype)
+    matrix.setflags(write=False)
+    return {'zones': zones, 'table': table, 'matrix': matrix}
+
+
+@lru_cache(maxsize=None)
+def default_distances():
+    return compile_distances()
+
+
+def zone_positions(distances, values):
+    index = dense_index(values, len(distances['table']))
+    positions = np.full(len(index), -1, dtype=np.int64)
+    inside = index >= 0
+    positions[inside] = distances['table'][index[inside]]
+    return positions
+
+
+def _take(row, positions):
+    result = np.full(len(positions), np.nan, dtype=row.dtype)
+    known = positions >= 0
+    result[known] = row[positions[known]]
+    return result
+
+
+def distances_from(zone, zones=None, distances=None):
+    distances = distances or default_distances()
+    position = zone_positions(distances, [zone])[0]
+    if position < 0:
+        raise ValueError(f"Zone sans coordonnées: {zone}")
+    row = distances['matrix'][position]
+    if zones is None:
+        return row
+    return _take(row, zone_positions(distances, zones))
+
+
+def trip_distances(origins, dests, distances=None):
+    # Trips with a zone missing from the coordinates get NaN.
+    distances = distances or default_distances()
+    o = zone_positions(distances, origins)
+    d = zone_positions(distances, dests)
+    known = (o >= 0) & (d >= 0)
+
+    result = np.full(len(o), np.nan, dtype=distances['matrix'].dtype)
+    result[known] = distances['matrix'][o[known], d[known]]
+    return result
+
+
+def add_trip_distance(df, column='distance_km', distances=None):
+    return df.assign(**{column: trip_distances(df['originreportzone'].to_numpy(),
+                                               df['destreportzone'].to_numpy(), distances)})
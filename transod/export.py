@@ -0,0 +1,148 @@
+# Auteur : Rémy Wilson
+# Programme : Export des tableaux de résultats en xlsx (écriture en flux), CSV, Parquet/Arrow et JSON.
+# Date: 18 Octobre 2026
+
+import json
+import math
+import os
+import re
+
+import pandas as pd
+
+from transod.instrument import traced
+
+table_formats = ['xlsx', 'csv', 'parquet', 'feather', 'json']
+
+
+def _labels(index):
+    if isinstance(index, pd.MultiIndex):
+        return [' / '.join(str(part) for part in label) for label in index]
+    return [str(label) for label in index]
+
+
+def _cell(value):
+    if value is None:
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value if isinstance(value, (int, float, str)) else str(value)
+
+
+def sheet_title(name, used):
+    # Excel: at most 31 characters, none of []:*?/\ and unique within the workbook.
+    title = re.sub(r'[\[\]:*?/\\]', '_', str(name))[:31] or 'Feuille'
+    base, i = title, 1
+    while title.lower() in used:
+        i += 1
+        suffix = f' ({i})'
+        title = base[:31 - len(suffix)] + suffix
+    used.add(title.lower())
+    return title
+
+
+def write_xlsx(tables, path):
+    # Write-only workbook: rows are streamed to disk, so memory does not grow
+    # with the number of sheets or rows.
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    bold = Font(bold=True)
+    workbook = Workbook(write_only=True)
+    used = set()
+
+    def header(ws, value):
+        cell = WriteOnlyCell(ws, value=_cell(value))
+        cell.font = bold
+        return cell
+
+    for name, table in tables.items():
+        table = table.to_frame() if isinstance(table, pd.Series) else table
+        ws = workbook.create_sheet(sheet_title(name, used))
+        index_names = [n if n is not None else '' for n in table.index.names]
+        ws.append([header(ws, n) for n in index_names] + [header(ws, c) for c in _labels(table.columns)])
+
+        for row in table.itertuples(index=True, name=None):
+            label = row[0] if isinstance(row[0], tuple) else (row[0],)
+            ws.append([header(ws, part) for part in label] + [_cell(v) for v in row[1:]])
+
+    workbook.save(path)
+    return [path]
+
+
+def _table_paths(tables, path, ext):
+    root = os.path.splitext(path)[0]
+    if len(tables) == 1:
+        return {name: f'{root}.{ext}' for name in tables}
+    return {name: f'{root}_{re.sub(r"[^0-9A-Za-zÀ-ÿ_-]+", "_", str(name)).strip("_")}.{ext}' for name in tables}
+
+
+def _flat(table):
+    table = table.to_frame() if isinstance(table, pd.Series) else table.copy()
+    table.columns = _labels(table.columns)
+    return table
+
+
+def write_csv(tables, path):
+    paths = _table_paths(tables, path, 'csv')
+    for name, table in tables.items():
+        table.to_csv(paths[name])
+    return list(paths.values())
+
+
+def write_arrow(tables, path, kind='parquet'):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError(f"L'export {kind} nécessite pyarrow (pip install pyarrow)") from None
+
+    paths = _table_paths(tables, path, kind)
+    for name, table in tables.items():
+        table = _flat(table)
+        table.index = _labels(table.index) if isinstance(table.index, pd.MultiIndex) else table.index
+        if kind == 'parquet':
+            table.to_parquet(paths[name])
+        else:
+            table.reset_index().to_feather(paths[name])
+    return list(paths.values())
+
+
+def write_json(tables, path):
+    # One document {name: {index, columns, data}}, written table by table.
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{')
+        for i, (name, table) in enumerate(tables.items()):
+            table = _flat(table)
+            table.index = _labels(table.index)
+            f.write(('' if i == 0 else ',') + json.dumps(str(name), ensure_ascii=False) + ':')
+            f.write(table.to_json(orient='split', force_ascii=False))
+        f.write('}')
+    return [path]
+
+
+writers = {
+    'xlsx': write_xlsx,
+    'csv': write_csv,
+    'parquet': write_arrow,
+    'feather': lambda tables, path: write_arrow(tables, path, kind='feather'),
+    'json': write_json,
+}
+
+
+@traced('export_tables')
+def export_tables(tables, path, formats=None):
+    # `tables` maps a name (sheet or file suffix) to a DataFrame. The format comes
+    # from the extension of `path`, or `formats` writes the same tables several ways.
+    root, ext = os.path.splitext(path)
+    formats = formats or [ext.lstrip('.').lower() or 'csv']
+    unknown = [fmt for fmt in formats if fmt not in writers]
+    if unknown:
+        raise ValueError(f"Format(s) d'export inconnu(s): {', '.join(unknown)} (choix: {', '.join(table_formats)})")
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    paths = []
+    for fmt in formats:
+        paths += writers[fmt](tables, f'{root}.{fmt}')
+    return paths
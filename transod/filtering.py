@@ -0,0 +1,83 @@
+# Auteur : Rémy Wilson
+# Programme : Filtrage en une seule passe des données brutes TRANSOD.
+# Date: 18 Octobre 2026
+
+import numpy as np
+import pandas as pd
+
+from transod.codes import membership_mask
+from transod.instrument import stage
+from transod.streaming import read_chunks
+
+valid_zones = [
+    1, 50, 100, 120, 140, 180, 200, 240, 260, 300, 350, 360, 400,
+    425, 450, 500, 560, 600, 625, 650, 700, 750, 800, 820, 840, 845
+]
+
+valid_purposes = [10, 11, 12, 20, 30, 40, 41, 43, 44, 46, 51, 52, 80, 777, 888]
+
+valid_modes = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 13, 14, 15, 16, 18, 21, 22, 23, 24, 77]
+
+# Same order as the former zoneorigin -> zonedest -> trippurpose -> modeprimary chain.
+filter_rules = {
+    'originreportzone': valid_zones,
+    'destreportzone': valid_zones,
+    'trippurpose': valid_purposes,
+    'modeprimary': valid_modes,
+}
+
+
+def filter_frame(df, rules=None):
+    rules = rules or filter_rules
+
+    with stage('filter_frame', rows_in=len(df)) as record:
+        keep = np.ones(len(df), dtype=bool)
+        rejected = {}
+        for column_name, values_to_keep in rules.items():
+            rule_mask = membership_mask(df[column_name].to_numpy(), values_to_keep)
+            rejected[column_name] = int((~rule_mask).sum())
+            keep &= rule_mask
+
+        report = {
+            'rows_in': len(df),
+            'rows_out': int(keep.sum()),
+            'rejected': rejected,
+        }
+        record['rows_out'] = report['rows_out']
+        return df[keep], report
+
+
+def print_report(report):
+    print(f"Lignes originales: {report['rows_in']}")
+    for column_name, count in report['rejected'].items():
+        print(f"Lignes rejetées ({column_name}): {count}")
+    print(f"Lignes conservées: {report['rows_out']}")
+    print(f"Lignes supprimées: {report['rows_in'] - report['rows_out']}")
+
+
+def merge_reports(a, b):
+    rejected = dict(a['rejected'])
+    for column_name, count in b['rejected'].items():
+        rejected[column_name] = rejected.get(column_name, 0) + count
+    return {
+        'rows_in': a['rows_in'] + b['rows_in'],
+        'rows_out': a['rows_out'] + b['rows_out'],
+        'rejected': rejected,
+    }
+
+
+def filter_csv(input_file, output_file, rules=None, chunksize=None):
+    with stage('filter_csv', source=input_file) as record:
+        if not chunksize:
+            df = pd.read_csv(input_file)
+            filtered_df, report = filter_frame(df, rules)
+            filtered_df.to_csv(output_file, index=False)
+        else:
+            report = None
+            for chunk in read_chunks(input_file, chunksize):
+                filtered_df, chunk_report = filter_frame(chunk, rules)
+                filtered_df.to_csv(output_file, index=False, mode='w' if report is None else 'a', header=report is None)
+                report = chunk_report if report is None else merge_reports(report, chunk_report)
+
+        record.update(rows_in=report['rows_in'], rows_out=report['rows_out'], rejected=report['rejected'])
+        return report
@@ -0,0 +1,133 @@
+# Auteur : Rémy Wilson
+# Programme : État agrégé fusionnable, mis à jour lot par lot à l'arrivée de nouvelles données.
+# Date: 18 Octobre 2026
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from transod.cache import file_hash, load_trips
+from transod.cube import add_cubes, build_cube, default_dims, weight_col
+from transod.filtering import filter_frame, merge_reports
+from transod.instrument import stage
+from transod.streaming import read_chunks
+
+
+trip_columns = ['originreportzone', 'destreportzone', 'departtime', 'trippurpose', 'modeprimary', weight_col]
+
+
+def batch_state(df, dims=None, source=None, raw=True):
+    report = None
+    if raw:
+        df, report = filter_frame(df)
+
+    # A batch without expansion factors counts each trip once in the weighted totals.
+    weights = df[weight_col] if weight_col in df.columns else np.ones(len(df))
+    state = build_cube(df, dims or default_dims, totals=weights)
+    state['totals'] = state['totals'].astype(np.float64)
+    state['squares'] = state['squares'].astype(np.float64)
+    state['sources'] = [{
+        'source': source,
+        'rows_in': report['rows_in'] if report else len(df),
+        'rows_out': len(df),
+        'rejected': report['rejected'] if report else {},
+    }]
+    return state
+
+
+def empty_state(dims=None):
+    state = batch_state(pd.DataFrame(columns=trip_columns), dims, raw=False)
+    state['sources'] = []
+    return state
+
+
+def copy_state(state):
+    # Independent arrays and source entries, so that folding into one state never changes the other.
+    copied = {key: value.copy() if isinstance(value, np.ndarray) else value for key, value in state.items()}
+    copied['labels'] = {dim: list(labels) for dim, labels in state['labels'].items()}
+    copied['sources'] = [dict(entry) for entry in state['sources']]
+    return copied
+
+
+def merge_states(a, b):
+    merged = add_cubes(a, b)
+    merged['sources'] = a['sources'] + b['sources']
+    return merged
+
+
+def _fold(total, part):
+    # Chunks of one file are reported as a single source.
+    merged = add_cubes(total, part)
+    entry = total['sources'][0]
+    merged['sources'] = [dict(entry, **merge_reports(entry, part['sources'][0]))]
+    return merged
+
+
+def ingest_frame(state, df, source=None, raw=True):
+    return merge_states(state, batch_state(df, state['dims'], source, raw))
+
+
+def aggregate_csv(path, dims=None, raw=True, chunksize=1_000_000, sha1=None):
+    # The source entry carries the file's sha1, so a state built here is never
+    # ingested twice by ingest_csv.
+    sha1 = sha1 or file_hash(path)
+    with stage('aggregate_csv', source=path) as record:
+        total = None
+        for chunk in read_chunks(path, chunksize, usecols=lambda column: column in trip_columns):
+            part = batch_state(chunk, dims, raw=raw)
+            total = part if total is None else _fold(total, part)
+
+        if total is None:
+            total = batch_state(pd.DataFrame(columns=trip_columns), dims, raw=False)
+        total['sources'][0].update(source=os.path.basename(path), sha1=sha1)
+        record.update(rows_in=total['sources'][0]['rows_in'], rows_out=total['sources'][0]['rows_out'])
+        return total
+
+
+def ingest_csv(state, path, raw=True, chunksize=1_000_000):
+    sha1 = file_hash(path)
+    if any(entry.get('sha1') == sha1 for entry in state['sources']):
+        return state
+
+    return merge_states(state, aggregate_csv(path, state['dims'], raw=raw, chunksize=chunksize, sha1=sha1))
+
+
+def save_state(state, path):
+    meta = {'dims': state['dims'], 'labels': state['labels'], 'sources': state['sources']}
+    tmp = path + '.tmp.npz'
+    arrays = {key: state[key] for key in ('counts', 'totals', 'squares') if key in state}
+    np.savez_compressed(tmp, meta=json.dumps(meta), **arrays)
+    os.replace(tmp, path)
+
+
+def load_state(path):
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        state = {
+            'dims': meta['dims'],
+            'labels': meta['labels'],
+            'counts': data['counts'],
+            'totals': data['totals'],
+            'sources': meta['sources'],
+        }
+        # States saved before the squared factors were kept have no 'squares'.
+        if 'squares' in data.files:
+            state['squares'] = data['squares']
+        return state
+
+
+def update_state(path, csv_paths, raw=True, chunksize=1_000_000):
+    state = load_state(path) if os.path.exists(path) else empty_state(default_dims)
+    for csv_path in csv_paths:
+        state = ingest_csv(state, csv_path, raw=raw, chunksize=chunksize)
+    save_state(state, path)
+    return state
+
+
+def load_data(csv_path=None, state_path=None):
+    # A saved aggregate state, when given, replaces the trip CSV.
+    if state_path:
+        return load_state(state_path)
+    return load_trips(csv_path)
@@ -0,0 +1,177 @@
+# Auteur : Rémy Wilson
+# Programme : Mesures par étape (temps, lignes, octets, mémoire) en trace JSON, avec profilage optionnel.
+# Date: 18 Octobre 2026
+
+import cProfile
+import datetime
+import functools
+import json
+import os
+import platform
+import signal
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# TRANSOD_PROFILE=<stage> profiles that stage with cProfile; <stage>:sampling uses
+# the SIGPROF sampler instead (collapsed stacks, readable by flamegraph tools).
+profile_spec = os.environ.get('TRANSOD_PROFILE')
+profile_dir = os.environ.get('TRANSOD_PROFILE_DIR', '.')
+sample_interval = 0.005
+
+records = []
+_stack = []
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return peak / (2**20 if sys.platform == 'darwin' else 2**10)
+
+
+def _io_counters():
+    # Bytes read and written by the process (all files, cache hits included).
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class _Sampler:
+    def __init__(self):
+        self.stacks = {}
+
+    def _sample(self, signum, frame):
+        names = []
+        while frame is not None:
+            names.append(f'{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})')
+            frame = frame.f_back
+        key = ';'.join(reversed(names))
+        self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def enable(self):
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, sample_interval, sample_interval)
+
+    def disable(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous)
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            for key, count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+                f.write(f'{key} {count}\n')
+
+
+def _profiler(name):
+    if not profile_spec:
+        return None
+    target, _, kind = profile_spec.partition(':')
+    if target != name:
+        return None
+    if kind == 'sampling' and hasattr(signal, 'setitimer'):
+        return _Sampler()
+    return cProfile.Profile()
+
+
+@contextmanager
+def stage(name, source=None, rows_in=None, **info):
+    # The yielded record can be completed by the caller (rows_out, bytes_written, ...).
+    record = {'stage': name, 'parent': _stack[-1]['stage'] if _stack else None, 'depth': len(_stack)}
+    if source is not None:
+        record['source'] = str(source)
+    if rows_in is not None:
+        record['rows_in'] = int(rows_in)
+    record.update(info)
+
+    profiler = _profiler(name)
+    io_before = _io_counters()
+    rss_before = _peak_rss_mb()
+    record['started'] = datetime.datetime.now().isoformat(timespec='milliseconds')
+    wall, cpu = time.perf_counter(), time.process_time()
+    _stack.append(record)
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield record
+    except BaseException as error:
+        record['error'] = repr(error)
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            suffix = 'folded' if isinstance(profiler, _Sampler) else 'prof'
+            path = os.path.join(profile_dir, f'{name}.{os.getpid()}.{len(records)}.{suffix}')
+            profiler.dump(path) if isinstance(profiler, _Sampler) else profiler.dump_stats(path)
+            record['profile'] = path
+        _stack.pop()
+
+        record['wall_s'] = time.perf_counter() - wall
+        record['cpu_s'] = time.process_time() - cpu
+        io_after = _io_counters()
+        if io_before and io_after:
+            record['bytes_read'] = io_after[0] - io_before[0]
+            record['bytes_written'] = io_after[1] - io_before[1]
+        peak = _peak_rss_mb()
+        if peak is not None:
+            record['peak_rss_mb'] = peak
+            record['peak_rss_growth_mb'] = peak - rss_before
+        records.append(record)
+
+
+def traced(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def take_records(start=0):
+    # Hands the records collected since `start` to the caller (e.g. back from a worker).
+    taken = records[start:]
+    del records[start:]
+    return taken
+
+
+def reset():
+    records.clear()
+
+
+def trace(meta=None):
+    return {
+        'meta': dict({
+            'pid': os.getpid(),
+            'argv': sys.argv,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'written': datetime.datetime.now().isoformat(timespec='seconds'),
+        }, **(meta or {})),
+        'stages': records,
+    }
+
+
+def write_trace(path, meta=None):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(trace(meta), f, indent=2, default=str)
+    os.replace(tmp, path)
+    return path
+
+
+def print_summary(file=sys.stderr):
+    for record in records:
+        rows = f"{record.get('rows_in', '')}->{record.get('rows_out', '')}" if 'rows_in' in record else ''
+        print(f"{'  ' * record['depth']}{record['stage']:<24} {record['wall_s']:8.3f} s "
+              f"cpu {record['cpu_s']:8.3f} s {rows}", file=file)
@@ -0,0 +1,157 @@
+# Auteur : Rémy Wilson
+# Programme : Cache disque des résultats d'analyse, adressé par le contenu des données.
+# Date: 18 Octobre 2026
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+import zlib
+
+import numpy as np
+import pandas as pd
+
+memo_dir = os.environ.get('TRANSOD_MEMO_DIR', '.transod-memo')
+max_bytes = int(os.environ.get('TRANSOD_MEMO_MAX_BYTES', 256 * 1024 * 1024))
+enabled = os.environ.get('TRANSOD_MEMO', '1') != '0'
+# Bump to invalidate every entry when a result format changes outside the package.
+cache_version = 1
+
+
+def _update(digest, obj):
+    if isinstance(obj, pd.DataFrame):
+        digest.update(b'frame')
+        _update(digest, [str(c) for c in obj.columns])
+        _update(digest, [str(t) for t in obj.dtypes])
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, (pd.Series, pd.Index)):
+        digest.update(b'series' + str(obj.dtype).encode())
+        digest.update(pd.util.hash_pandas_object(obj).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        digest.update(f'array{obj.dtype.str}{obj.shape}'.encode())
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        digest.update(b'dict')
+        for key in sorted(obj, key=repr):
+            _update(digest, key)
+            _update(digest, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f'{type(obj).__name__}{len(obj)}'.encode())
+        for item in obj:
+            _update(digest, item)
+    else:
+        digest.update(f'{type(obj).__name__}:{obj!r};'.encode())
+
+
+def fingerprint(*objs):
+    digest = hashlib.sha1()
+    for obj in objs:
+        _update(digest, obj)
+    return digest.hexdigest()
+
+
+def _source(func):
+    # The whole file the function is defined in, so that editing it or a helper
+    # next to it (e.g. classify_cube in a script) invalidates its entries. The
+    # module name does not matter, so a script and its import share them.
+    try:
+        with open(inspect.getsourcefile(func), 'rb') as f:
+            return f.read()
+    except (OSError, TypeError):
+        return func.__qualname__
+
+
+@functools.lru_cache(maxsize=None)
+def package_fingerprint():
+    # The statistics come from the transod helpers, not only from the memoized
+    # function: any edit to the package sources invalidates every entry.
+    digest = hashlib.sha1(f'version{cache_version}'.encode())
+    package = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(package)):
+        if name.endswith('.py'):
+            digest.update(name.encode())
+            with open(os.path.join(package, name), 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _path(key):
+    return os.path.join(memo_dir, key + '.pkz')
+
+
+def _load(key):
+    path = _path(key)
+    try:
+        with open(path, 'rb') as f:
+            result = pickle.loads(zlib.decompress(f.read()))
+    except (OSError, zlib.error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        # Entries pickled against classes that have since moved or disappeared are misses.
+        return None, False
+    os.utime(path)
+    return result, True
+
+
+def _evict(keep):
+    entries = []
+    for name in os.listdir(memo_dir):
+        if name.endswith('.pkz'):
+            st = os.stat(os.path.join(memo_dir, name))
+            entries.append((st.st_mtime_ns, st.st_size, name))
+
+    # Least recently used first; reads touch the file mtime.
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        try:
+            os.remove(os.path.join(memo_dir, name))
+        except OSError:
+            pass
+        total -= size
+
+
+def _store(key, result):
+    blob = zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    if len(blob) > max_bytes:
+        return
+    os.makedirs(memo_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.memo-', dir=memo_dir)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(blob)
+    os.replace(tmp, _path(key))
+    _evict(key + '.pkz')
+
+
+def memoize(func=None, depends=()):
+    # depends: module-level mappings the result is derived from, hashed at
+    # call time so that editing a category table invalidates the entry.
+    if func is None:
+        return functools.partial(memoize, depends=depends)
+
+    source = _source(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return func(*args, **kwargs)
+
+        key = fingerprint(package_fingerprint(), func.__qualname__, source, depends, args, kwargs)
+        result, hit = _load(key)
+        if hit:
+            return result
+        result = func(*args, **kwargs)
+        _store(key, result)
+        return result
+
+    return wrapper
+
+
+def clear():
+    if os.path.isdir(memo_dir):
+        for name in os.listdir(memo_dir):
+            if name.endswith('.pkz'):
+                os.remove(os.path.join(memo_dir, name))
@@ -0,0 +1,251 @@
+# Auteur : Rémy Wilson
+# Programme : Matrices origine-destination creuses par mode, motif et période, construites en une passe.
+# Date: 18 Octobre 2026
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from transod.categories import compile_mapping, lookup_codes, mode_categories, sector_classification, zones_dict
+from transod.codes import dense_index
+from transod.cube import cube_dimensions, hour_groups, marginal, rollup
+from transod.filtering import valid_modes
+from transod.instrument import stage
+from transod.timebins import bin_departures, time_periods
+
+default_slices = ['mode_category', 'purpose', 'period']
+
+# Valid departures outside every period (e.g. before 06:00) keep their own slice,
+# so that the default OD matrices still cover every trip.
+out_of_period = 'Hors période'
+
+# Above this many cells the aggregation sorts the keys instead of filling a dense array.
+dense_cells = 1 << 24
+
+# Category of each valid mode, in valid_modes order (unlisted modes fall in 'Autres').
+_mode_category_codes = lookup_codes(compile_mapping(mode_categories, default='Autres'), valid_modes)
+
+
+def _mode_category(df):
+    modes, _ = cube_dimensions['mode'](df)
+    return np.where(modes >= 0, _mode_category_codes[np.maximum(modes, 0)], -1), list(mode_categories)
+
+
+def _period(df):
+    bins = bin_departures(df['departtime'])
+    codes = np.asarray(bins['period'].codes, dtype=np.int64)
+    return np.where(bins['valid'] & (codes < 0), len(time_periods), codes), list(time_periods) + [out_of_period]
+
+
+def _period_groups():
+    groups = hour_groups(time_periods)
+    inside = {hour for hours in groups.values() for hour in hours}
+    return dict(groups, **{out_of_period: [hour for hour in range(30) if hour not in inside]})
+
+
+od_dimensions = dict(cube_dimensions, mode_category=_mode_category, period=_period)
+
+
+def _zone_codes(values, zones):
+    table = np.full(int(max(zones)) + 1, -1, dtype=np.int64)
+    table[list(zones)] = np.arange(len(zones))
+    index = dense_index(values, len(table))
+    return np.where(index >= 0, table[np.maximum(index, 0)], -1)
+
+
+def _observed_zones(df):
+    codes = np.concatenate([dense_index(df[column], np.iinfo(np.int32).max)
+                            for column in ('originreportzone', 'destreportzone')])
+    return np.unique(codes[codes >= 0]).tolist()
+
+
+def _from_keys(keys, weights, size):
+    # Non-zero cells of the flat (slice, origin, dest) key space, in key order.
+    if size <= dense_cells:
+        counts = np.bincount(keys, weights=weights, minlength=size)
+        cells = np.flatnonzero(counts)
+        return cells, counts[cells]
+    cells, inverse = np.unique(keys, return_inverse=True)
+    return cells, np.bincount(inverse.ravel(), weights=weights, minlength=len(cells))
+
+
+def _od(dims, labels, zones, cells, values):
+    n = len(zones)
+    return {
+        'dims': dims,
+        'labels': labels,
+        'zones': list(zones),
+        'slice': cells // (n * n),
+        'origin': cells // n % n,
+        'dest': cells % n,
+        'value': values,
+    }
+
+
+def _od_from_trips(df, dims, weights, zones):
+    zones = _observed_zones(df) if zones == 'observed' else list(zones or zones_dict)
+    origin = _zone_codes(df['originreportzone'], zones)
+    dest = _zone_codes(df['destreportzone'], zones)
+    axes = [od_dimensions[dim](df) for dim in dims]
+    shape = tuple(len(labels) for _, labels in axes)
+
+    # Trips outside a zone or a slice (invalid time, unknown mode, ...) are left out.
+    keep = (origin >= 0) & (dest >= 0)
+    for codes, _ in axes:
+        keep &= codes >= 0
+
+    n = len(zones)
+    slices = np.ravel_multi_index([codes[keep] for codes, _ in axes], shape) if dims else 0
+    keys = (slices * n + origin[keep]) * n + dest[keep]
+    if weights is not None:
+        weights = np.asarray(df[weights] if isinstance(weights, str) else weights, dtype=np.float64)[keep]
+    cells, values = _from_keys(keys, weights, int(np.prod(shape)) * n * n)
+    return _od(dims, {dim: labels for dim, (_, labels) in zip(dims, axes)}, zones, cells, values)
+
+
+def _od_from_cube(cube, dims, weights):
+    # Saved aggregate states: periods and mode categories are rolled up from hours and modes.
+    if weights is not None and 'totals' in cube:
+        cube = dict(cube, counts=cube['totals'])
+    sources = {'period': 'hour', 'mode_category': 'mode'}
+    cube = marginal(cube, [sources.get(dim, dim) for dim in dims] + ['origin', 'dest'])
+    if 'period' in dims:
+        cube = rollup(cube, 'hour', _period_groups(), name='period')
+    if 'mode_category' in dims:
+        cube = rollup(cube, 'mode', mode_categories, name='mode_category')
+    cube = marginal(cube, dims + ['origin', 'dest'])
+
+    counts = cube['counts'].ravel()
+    cells = np.flatnonzero(counts)
+    return _od(dims, {dim: cube['labels'][dim] for dim in dims}, cube['labels']['origin'], cells, counts[cells])
+
+
+def build_od(data, dims=None, weights=None, zones=None):
+    # Every OD matrix of every slice (e.g. mode category x purpose x period) comes from
+    # one aggregation and is stored as its non-zero cells only. `zones` defaults to the
+    # report zones; 'observed' keeps every zone code present in the trips.
+    dims = list(default_slices if dims is None else dims)
+    with stage('build_od', rows_in=None if isinstance(data, dict) else len(data), dims=dims) as record:
+        od = _od_from_cube(data, dims, weights) if isinstance(data, dict) else \
+            _od_from_trips(data, dims, weights, zones)
+        record['cells'] = len(od['value'])
+        return od
+
+
+def _selected(od, where):
+    mask = np.ones(len(od['value']), dtype=bool)
+    if not where:
+        return mask
+    shape = tuple(len(od['labels'][dim]) for dim in od['dims'])
+    codes = np.unravel_index(od['slice'], shape)
+    for dim, labels in where.items():
+        if dim not in od['dims']:
+            raise ValueError(f"Dimension inconnue: {dim} (choix: {', '.join(od['dims'])})")
+        labels = labels if isinstance(labels, (list, tuple, set)) else [labels]
+        unknown = [label for label in labels if label not in od['labels'][dim]]
+        if unknown:
+            raise ValueError(f"Valeur(s) inconnue(s) pour {dim}: {', '.join(map(str, unknown))}")
+        mask &= np.isin(codes[od['dims'].index(dim)], [od['labels'][dim].index(label) for label in labels])
+    return mask
+
+
+def _pairs(od, where):
+    # Origin-destination flows of the selected slices, summed over the others.
+    mask = _selected(od, where)
+    n = len(od['zones'])
+    keys = od['origin'][mask] * n + od['dest'][mask]
+    cells, inverse = np.unique(keys, return_inverse=True)
+    return cells // n, cells % n, np.bincount(inverse.ravel(), weights=od['value'][mask], minlength=len(cells))
+
+
+def od_matrix(od, sparse=True, **where):
+    # where: dim=label or dim=[labels], e.g. od_matrix(od, period='Matin pointe', mode_category='Auto').
+    origin, dest, values = _pairs(od, where)
+    n = len(od['zones'])
+    if not sparse:
+        return np.bincount(origin * n + dest, weights=values, minlength=n * n).reshape(n, n)
+
+    from scipy.sparse import csr_matrix
+    return csr_matrix((values, (origin, dest)), shape=(n, n))
+
+
+def od_slices(od, dim, sparse=True, **where):
+    return {label: od_matrix(od, sparse, **dict(where, **{dim: label})) for label in od['labels'][dim]}
+
+
+def _zone_name(code):
+    return zones_dict.get(code, str(code))
+
+
+def top_flows(od, k=10, intrazonal=True, **where):
+    origin, dest, values = _pairs(od, where)
+    if not intrazonal:
+        keep = origin != dest
+        origin, dest, values = origin[keep], dest[keep], values[keep]
+    # Shares of the flows the table ranks: interzonal trips only when intrazonal=False.
+    total = values.sum()
+
+    if len(values) > k:
+        top = np.argpartition(values, len(values) - k)[len(values) - k:]
+        origin, dest, values = origin[top], dest[top], values[top]
+    order = np.argsort(-values, kind='stable')
+    zones = np.asarray(od['zones'])
+    table = pd.DataFrame({
+        'Origine': zones[origin[order]],
+        'Destination': zones[dest[order]],
+        'Deplacements': values[order],
+        'Part': values[order] / total if total else np.nan,
+    })
+    table.insert(1, 'Origine_Nom', table['Origine'].map(_zone_name))
+    table.insert(3, 'Destination_Nom', table['Destination'].map(_zone_name))
+    return table
+
+
+def intrazonal_share(od, by_origin=False, **where):
+    # Share of trips that stay in their origin zone, overall or for each origin zone.
+    origin, dest, values = _pairs(od, where)
+    n = len(od['zones'])
+    inside = origin == dest
+    if not by_origin:
+        total = values.sum()
+        return float(values[inside].sum() / total) if total else np.nan
+
+    totals = np.bincount(origin, weights=values, minlength=n)
+    within = np.bincount(origin[inside], weights=values[inside], minlength=n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = within / totals
+    return pd.Series(share, index=pd.Index(od['zones'], name='Zone_ID'), name='Part_Intrazonale')
+
+
+def sector_rollup(od, groups=None, **where):
+    # Sector x sector flows; zones listed in no group fall into 'Autre', shown only if used.
+    lookup = compile_mapping(groups or sector_classification, default='Autre')
+    sectors = lookup_codes(lookup, od['zones'])
+    origin, dest, values = _pairs(od, where)
+
+    n = len(lookup['labels'])
+    counts = np.bincount(sectors[origin] * n + sectors[dest], weights=values, minlength=n * n).reshape(n, n)
+    table = pd.DataFrame(counts, index=pd.Index(lookup['labels'], name='Secteur origine'),
+                         columns=pd.Index(lookup['labels'], name='Secteur destination'))
+    used = (counts.sum(axis=0) + counts.sum(axis=1)) > 0
+    return table.loc[used, used]
+
+
+def save_od(od, path):
+    meta = {'dims': od['dims'], 'labels': od['labels']}
+    np.savez_compressed(path, meta=np.array(json.dumps(meta, ensure_ascii=False)),
+                        zones=np.asarray(od['zones'], dtype=np.int64),
+                        **{key: od[key] for key in ('slice', 'origin', 'dest', 'value')})
+    return path
+
+
+def load_od(path):
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        return {
+            'dims': meta['dims'],
+            'labels': meta['labels'],
+            'zones': data['zones'].tolist(),
+            **{key: data[key] for key in ('slice', 'origin', 'dest', 'value')},
+        }
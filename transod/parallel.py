@@ -0,0 +1,46 @@
+# Auteur : Rémy Wilson
+# Programme : Exécution de lots indépendants sur un pool de processus avec des graines déterministes.
+# Date: 18 Octobre 2026
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from transod import instrument
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def _traced_task(func, item):
+    # A forked worker inherits the parent's records: only this task's are sent back.
+    start = len(instrument.records)
+    result = func(item)
+    return result, instrument.take_records(start)
+
+
+def map_parallel(func, items, workers=None):
+    # Stage records of the workers are merged into the parent's, in task order,
+    # so that the trace shows which input each stage ran on.
+    items = list(items)
+    workers = min(workers or default_workers(), len(items))
+    if workers <= 1:
+        return [func(item) for item in items]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result, task_records in pool.map(partial(_traced_task, func), items):
+            instrument.records.extend(task_records)
+            results.append(result)
+    return results
+
+
+def batch_seeds(n_total, batch_size, seed=None):
+    # One child seed per batch, so results depend on the seed and batch size only,
+    # never on how many workers share the batches.
+    n_batches = -(-n_total // batch_size)
+    children = np.random.SeedSequence(seed).spawn(n_batches)
+    sizes = [batch_size] * (n_batches - 1) + [n_total - batch_size * (n_batches - 1)]
+    return list(zip(sizes, children))
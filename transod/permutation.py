@@ -0,0 +1,86 @@
+# Auteur : Rémy Wilson
+# Programme : Test de permutation Monte Carlo (chi-carré et V de Cramér) pour l'indépendance.
+# Date: 18 Octobre 2026
+
+import numpy as np
+
+from transod.contingency import chi2_batch
+from transod.instrument import traced
+from transod.parallel import batch_seeds, map_parallel
+
+
+def random_tables(row_totals, col_totals, size, rng, method='permutation'):
+    row_totals = np.asarray(row_totals, dtype=np.int64)
+    col_totals = np.asarray(col_totals, dtype=np.int64)
+    n_rows, n_cols = len(row_totals), len(col_totals)
+
+    if method == 'multinomial':
+        n = row_totals.sum()
+        p = np.outer(row_totals, col_totals).ravel() / n ** 2
+        return rng.multinomial(n, p, size=size).reshape(size, n_rows, n_cols)
+    if method != 'permutation':
+        raise ValueError(f"Méthode inconnue: {method}")
+
+    # Permuting one variable against the other is the same as drawing a table with
+    # both margins fixed; each row is filled by a chain of hypergeometric draws.
+    tables = np.zeros((size, n_rows, n_cols), dtype=np.int64)
+    remaining = np.repeat(col_totals[np.newaxis], size, axis=0)
+    for i in range(n_rows - 1):
+        need = np.full(size, row_totals[i])
+        left = remaining.sum(axis=1)
+        for j in range(n_cols - 1):
+            left = left - remaining[:, j]
+            drawn = rng.hypergeometric(remaining[:, j], left, need)
+            tables[:, i, j] = drawn
+            need = need - drawn
+        tables[:, i, -1] = need
+        remaining = remaining - tables[:, i]
+    tables[:, -1] = remaining
+    return tables
+
+
+def _resample_batch(task):
+    row_totals, col_totals, size, seed, method = task
+    rng = np.random.default_rng(seed)
+    results = chi2_batch(random_tables(row_totals, col_totals, size, rng, method))
+    return results['chi2'], results['cramers_v']
+
+
+def _monte_carlo_p(null, observed):
+    # Small relative tolerance so that resamples equal to the observed value count as
+    # "at least as extreme" despite floating-point noise.
+    exceed = int((null >= observed * (1 - 1e-12)).sum())
+    p = (exceed + 1) / (len(null) + 1)
+    return p, float(np.sqrt(p * (1 - p) / len(null)))
+
+
+@traced('permutation_test')
+def permutation_test(table, n_resamples=20000, method='permutation', batch_size=1000,
+                     seed=None, workers=None):
+    table = np.asarray(table, dtype=np.int64)
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+    row_totals, col_totals = table.sum(axis=1), table.sum(axis=0)
+
+    observed = chi2_batch(table)
+    tasks = [
+        (row_totals, col_totals, size, child, method)
+        for size, child in batch_seeds(n_resamples, batch_size, seed)
+    ]
+    batches = map_parallel(_resample_batch, tasks, workers)
+    null_chi2 = np.concatenate([chi2 for chi2, _ in batches])
+    null_v = np.concatenate([v for _, v in batches])
+
+    p_value, p_se = _monte_carlo_p(null_chi2, observed['chi2'])
+    p_value_v, p_se_v = _monte_carlo_p(null_v, observed['cramers_v'])
+    return {
+        'chi2': float(observed['chi2']),
+        'dof': int(observed['dof']),
+        'cramers_v': float(observed['cramers_v']),
+        'p_asymptotic': float(observed['p']),
+        'p_value': p_value,
+        'p_se': p_se,
+        'p_value_v': p_value_v,
+        'p_se_v': p_se_v,
+        'n_resamples': len(null_chi2),
+        'method': method,
+    }
@@ -0,0 +1,82 @@
+# Auteur : Rémy Wilson
+# Programme : Rendu des figures vers des fichiers (PNG/SVG/HTML) sans affichage, réparti sur un pool de processus.
+# Date: 18 Octobre 2026
+
+import os
+
+from transod import instrument
+from transod.parallel import map_parallel
+
+
+def headless():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def as_figures(result):
+    if result is None:
+        return []
+    if isinstance(result, (list, tuple)):
+        return list(result)
+    return [result]
+
+
+def _is_plotly(fig):
+    return hasattr(fig, 'write_html')
+
+
+def show(result):
+    figures = as_figures(result)
+    for fig in figures:
+        if _is_plotly(fig):
+            fig.show()
+    if any(not _is_plotly(fig) for fig in figures):
+        import matplotlib.pyplot as plt
+        plt.show()
+
+
+def figure_formats(fig, formats):
+    # Plotly figures are written as HTML (static images would need kaleido);
+    # matplotlib figures take every other format, PNG by default.
+    if _is_plotly(fig):
+        return ['html']
+    return [fmt for fmt in formats if fmt != 'html'] or ['png']
+
+
+def save_figure(fig, path, dpi=150):
+    if _is_plotly(fig):
+        fig.write_html(path, include_plotlyjs='cdn')
+        return path
+
+    import matplotlib.pyplot as plt
+    fig = getattr(fig, 'figure', fig)
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return path
+
+
+def render_job(job):
+    # job: (script, plotting function, keyword arguments, output stem, formats).
+    headless()
+    from transod.cli import load_script
+
+    script, function, kwargs, stem, formats = job
+    with instrument.stage('render', source=stem, function=function) as record:
+        figures = as_figures(getattr(load_script(script), function)(**kwargs))
+
+        os.makedirs(os.path.dirname(stem) or '.', exist_ok=True)
+        paths = []
+        for i, fig in enumerate(figures):
+            suffix = f'_{i + 1}' if len(figures) > 1 else ''
+            for fmt in figure_formats(fig, formats):
+                paths.append(save_figure(fig, f'{stem}{suffix}.{fmt}'))
+        record['files'] = len(paths)
+    return paths
+
+
+def render_all(jobs, workers=None):
+    # Each job only carries precomputed aggregates, so workers never touch the trips.
+    paths = []
+    for job_paths in map_parallel(render_job, jobs, workers):
+        paths += job_paths
+    return paths
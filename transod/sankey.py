@@ -0,0 +1,91 @@
+# Auteur : Rémy Wilson
+# Programme : Nœuds et liens d'un diagramme Sankey à plusieurs étapes, à partir d'un cube de comptes.
+# Date: 18 Octobre 2026
+
+import numpy as np
+
+from transod.cube import marginal
+from transod.instrument import traced
+
+default_color = '#95a5a6'
+
+
+def hex_to_rgba(hex_colors, alpha=0.25):
+    # Vectorized over an array of '#rgb' / '#rrggbb' strings; anything unparsable is grey.
+    hex_colors = np.asarray(hex_colors, dtype=str)
+    unique, inverse = np.unique(hex_colors, return_inverse=True)
+
+    rgba = []
+    for color in unique:
+        color = color.lstrip('#')
+        if len(color) == 3:
+            color = ''.join(c * 2 for c in color)
+        try:
+            r, g, b = (int(color[i:i + 2], 16) for i in (0, 2, 4))
+        except ValueError:
+            r, g, b = (150, 150, 150)
+        rgba.append(f'rgba({r},{g},{b},{alpha})')
+    return np.array(rgba, dtype=object)[inverse.ravel()]
+
+
+def _stage_colors(labels, colors):
+    if isinstance(colors, str):
+        return [colors] * len(labels)
+    colors = colors or {}
+    return [colors.get(label, default_color) for label in labels]
+
+
+@traced('sankey_data')
+def sankey_data(cube, stages, colors=None, alpha=0.25, max_flows=None):
+    # stages: cube dims in flow order (e.g. origin_sector -> period -> purpose -> mode).
+    # colors: stage -> {label: hex} or a single hex for the whole stage. Links take
+    # the colour of their source node. max_flows keeps only the largest full paths.
+    colors = colors or {}
+    counts = marginal(cube, stages)['counts'].astype(np.float64)
+    if len(stages) == 1:
+        counts = counts.reshape(-1)
+
+    if max_flows is not None and np.count_nonzero(counts) > max_flows:
+        flat = counts.ravel()
+        threshold = np.partition(flat, flat.size - max_flows)[flat.size - max_flows]
+        # Ties at the threshold are resolved like nlargest: first cells win.
+        keep = np.flatnonzero(flat > threshold)
+        ties = np.flatnonzero(flat == threshold)[:max_flows - len(keep)]
+        mask = np.zeros(flat.size, dtype=bool)
+        mask[keep] = True
+        mask[ties] = True
+        counts = np.where(mask.reshape(counts.shape), counts, 0.0)
+
+    # Nodes: the labels of each stage that carry any flow.
+    labels = []
+    node_colors = []
+    positions = []
+    for axis, stage in enumerate(stages):
+        totals = counts.sum(axis=tuple(a for a in range(len(stages)) if a != axis))
+        present = np.flatnonzero(totals > 0)
+        stage_labels = [cube['labels'][stage][i] for i in present]
+
+        position = np.full(len(totals), -1, dtype=np.int64)
+        position[present] = np.arange(len(labels), len(labels) + len(present))
+        positions.append(position)
+        labels += stage_labels
+        node_colors += _stage_colors(stage_labels, colors.get(stage))
+
+    node_rgba = hex_to_rgba(node_colors, alpha)
+    source, target, value = [], [], []
+    for axis in range(len(stages) - 1):
+        pair = counts.sum(axis=tuple(a for a in range(len(stages)) if a not in (axis, axis + 1)))
+        i, j = np.nonzero(pair)
+        source.append(positions[axis][i])
+        target.append(positions[axis + 1][j])
+        value.append(pair[i, j])
+
+    source = np.concatenate(source) if source else np.empty(0, dtype=np.int64)
+    return {
+        'labels': labels,
+        'node_colors': node_colors,
+        'source': source,
+        'target': np.concatenate(target) if target else np.empty(0, dtype=np.int64),
+        'value': np.concatenate(value) if value else np.empty(0),
+        'link_colors': node_rgba[source],
+    }
@@ -0,0 +1,51 @@
+# Auteur : Rémy Wilson
+# Programme : Lecture par blocs d'un CSV avec un fil de lecture en arrière-plan.
+# Date: 18 Octobre 2026
+
+import queue
+import threading
+
+import pandas as pd
+
+_done = object()
+
+
+def read_chunks(path, chunksize=1_000_000, prefetch=2, **read_csv_kwargs):
+    # At most `prefetch` chunks wait in the queue, so memory is bounded by the chunk
+    # size while parsing of the next chunk overlaps with work on the current one.
+    chunks = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader():
+        try:
+            with pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs) as parts:
+                for chunk in parts:
+                    if not put(chunk):
+                        return
+        except Exception as exc:
+            put(exc)
+        finally:
+            put(_done)
+
+    thread = threading.Thread(target=reader, name='transod-reader', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,207 @@
+# Auteur : Rémy Wilson
+# Programme : Générateur synthétique TRANSOD à partir de tableaux agrégés, sans aucun enregistrement réel.
+# Date: 18 Octobre 2026
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from transod.contingency import chi2_batch
+from transod.cube import weight_col
+from transod.parallel import batch_seeds, map_parallel
+from transod.timebins import hhmm_to_minutes
+
+synth_columns = ['originreportzone', 'destreportzone', 'departtime', 'trippurpose', 'modeprimary']
+
+# Departure times are kept as bins of this many minutes, expansion factors as
+# quantile bins; a zone with fewer trips than factor_min_trips uses the bins of
+# the whole survey, so that no individual factor can be read back from the model.
+time_bin_minutes = 15
+factor_bins = 40
+factor_min_trips = 100
+
+# Joint distributions a synthetic sample must reproduce beyond the one-way marginals,
+# and the largest total variation distance allowed between real and synthetic shares.
+checked_pairs = [('originreportzone', 'modeprimary'), ('originreportzone', 'trippurpose')]
+max_joint_gap = 0.03
+
+
+def _factor_edges(factors):
+    return np.quantile(factors, np.linspace(0, 1, factor_bins + 1))
+
+
+def fit_model(df, time_bin=time_bin_minutes):
+    # The model only holds aggregate tables:
+    #   - the count of trips in every non-empty (origin, destination, time bin,
+    #     purpose, mode) cell, so that zone-level associations are kept;
+    #   - quantile bins of tripfactor by origin zone.
+    # Trip records are never stored, and a synthetic row is a cell drawn in
+    # proportion to its count, with a departure and a factor drawn within it.
+    origins = df['originreportzone'].to_numpy(dtype=np.int64)
+    dests = df['destreportzone'].to_numpy(dtype=np.int64)
+    zones, zone_index = np.unique(np.concatenate([origins, dests]), return_inverse=True)
+    n_zones = len(zones)
+    o, d = zone_index[:len(df)], zone_index[len(df):]
+
+    minutes = hhmm_to_minutes(df['departtime'].to_numpy())
+    time_bins = np.where(minutes >= 0, minutes // time_bin, -1)
+    profile_codes = np.column_stack([time_bins, df['trippurpose'].to_numpy(dtype=np.int64),
+                                     df['modeprimary'].to_numpy(dtype=np.int64)])
+    profiles, profile_index = np.unique(profile_codes, axis=0, return_inverse=True)
+    cells, cell_counts = np.unique((o * n_zones + d) * len(profiles) + profile_index.ravel(),
+                                   return_counts=True)
+
+    factors = df[weight_col].to_numpy(dtype=np.float64) if weight_col in df.columns else np.ones(len(df))
+    overall = _factor_edges(factors)
+    trips_by_zone = np.bincount(o, minlength=n_zones)
+    edges = np.array([_factor_edges(factors[o == z]) if trips_by_zone[z] >= factor_min_trips else overall
+                      for z in range(n_zones)])
+
+    return {
+        'zones': zones,
+        'profiles': profiles,
+        'cells': cells,
+        'cell_probs': cell_counts / cell_counts.sum(),
+        'time_bin': np.int64(time_bin),
+        'factor_edges': edges,
+    }
+
+
+def save_model(model, path):
+    np.savez_compressed(path, **model)
+
+
+def load_model(path):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def _draw(model, n, rng):
+    # Cells from one multinomial draw, shuffled so that rows do not come out sorted.
+    n_zones, n_profiles = len(model['zones']), len(model['profiles'])
+    counts = rng.multinomial(n, model['cell_probs'])
+    cells = rng.permutation(np.repeat(model['cells'], counts))
+    od, profile = cells // n_profiles, cells % n_profiles
+    o, d = od // n_zones, od % n_zones
+
+    # Departure uniformly inside its time bin; a factor log-uniformly inside one of
+    # the origin zone's quantile bins (the top bin is long-tailed), rounded to the
+    # survey's two decimals.
+    time_bin = int(model['time_bin'])
+    bins = model['profiles'][profile, 0]
+    minutes = np.where(bins >= 0, bins * time_bin + rng.integers(0, time_bin, n), -1)
+    minutes = np.where(minutes > 29 * 60 + 59, 29 * 60 + 59, minutes)
+
+    edges = model['factor_edges'][o]
+    q = rng.integers(0, edges.shape[1] - 1, n)
+    low, high = edges[np.arange(n), q], edges[np.arange(n), q + 1]
+    factors = np.round(low * (high / low) ** rng.random(n), 2)
+    return o, d, profile, minutes, factors
+
+
+def _hhmm(minutes):
+    # Invalid survey times (no bin) are written as 9999, which no rule accepts.
+    return np.where(minutes >= 0, minutes // 60 * 100 + minutes % 60, 9999)
+
+
+def sample_trips(model, n, rng):
+    o, d, profile, minutes, factors = _draw(model, n, rng)
+    return pd.DataFrame({
+        'originreportzone': model['zones'][o],
+        'destreportzone': model['zones'][d],
+        'departtime': _hhmm(minutes),
+        'trippurpose': model['profiles'][profile, 1],
+        'modeprimary': model['profiles'][profile, 2],
+        weight_col: factors,
+    })
+
+
+def _joint_tables(frames, row, col):
+    # One crosstab per frame, on the union of the codes seen in any of them.
+    _, rows = np.unique(np.concatenate([df[row].to_numpy() for df in frames]), return_inverse=True)
+    _, cols = np.unique(np.concatenate([df[col].to_numpy() for df in frames]), return_inverse=True)
+    n_rows, n_cols = rows.max() + 1, cols.max() + 1
+    frame = np.repeat(np.arange(len(frames)), [len(df) for df in frames])
+    keys = (frame * n_rows + rows.ravel()) * n_cols + cols.ravel()
+    return np.bincount(keys, minlength=len(frames) * n_rows * n_cols).reshape(len(frames), n_rows, n_cols)
+
+
+def joint_gaps(real, synthetic, pairs=None):
+    # Total variation distance between the joint shares of each pair of columns,
+    # with Cramér's V on both sides.
+    records = []
+    for row, col in pairs or checked_pairs:
+        tables = _joint_tables([real, synthetic], row, col)
+        shares = tables / tables.sum(axis=(1, 2), keepdims=True)
+        v = chi2_batch(tables, correction=False)['cramers_v']
+        records.append({
+            'Variables': f'{row} x {col}',
+            'Ecart': 0.5 * np.abs(shares[0] - shares[1]).sum(),
+            'V_reel': v[0],
+            'V_synthetique': v[1],
+        })
+    return pd.DataFrame(records)
+
+
+def check_model(model, df, seed=None, tolerance=max_joint_gap):
+    # A sample the size of the data must keep its zone-level associations.
+    gaps = joint_gaps(df, sample_trips(model, len(df), np.random.default_rng(seed)))
+    failed = gaps.loc[gaps['Ecart'] > tolerance, 'Variables']
+    if len(failed):
+        raise ValueError(f"Le modèle s'écarte des données pour: {', '.join(failed)}")
+    return gaps
+
+
+def _text_tables(model):
+    # CSV fragments of every zone, profile and departure time, formatted once: a chunk
+    # is then assembled by indexing them instead of formatting each row with to_csv.
+    return {
+        'zone': np.array([str(z) for z in model['zones'].tolist()], dtype=object),
+        'profile': np.array([f',{p[1]},{p[2]},' for p in model['profiles'].tolist()], dtype=object),
+        'time': np.array([str(h) for h in _hhmm(np.arange(-1, 30 * 60)).tolist()], dtype=object),
+    }
+
+
+def _format_factors(factors):
+    values, inverse = np.unique(factors, return_inverse=True)
+    return np.array([repr(float(v)) for v in values], dtype=object)[inverse.ravel()]
+
+
+def _write_part(task):
+    model, text, n, seed, path = task
+    rng = np.random.default_rng(seed)
+    o, d, profile, minutes, factors = _draw(model, n, rng)
+
+    lines = (text['zone'][o] + ',' + text['zone'][d] + ',' + text['time'][minutes + 1]
+             + text['profile'][profile] + _format_factors(factors))
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines.tolist()))
+        f.write('\n')
+    return path
+
+
+def generate_csv(model, rows, path, chunk_rows=1_000_000, seed=None, workers=None):
+    # Chunks are written by the pool to part files, then concatenated behind the
+    # header. Each chunk has its own seed, so the output does not depend on workers.
+    parent = os.path.dirname(os.path.abspath(path))
+    tmp_dir = tempfile.mkdtemp(prefix='.synth-', dir=parent)
+    try:
+        text = _text_tables(model)
+        tasks = [(model, text, size, child, os.path.join(tmp_dir, f'part{i:05d}.csv'))
+                 for i, (size, child) in enumerate(batch_seeds(rows, chunk_rows, seed))]
+        parts = map_parallel(_write_part, tasks, workers)
+
+        tmp = os.path.join(tmp_dir, 'out.csv')
+        with open(tmp, 'wb') as out:
+            out.write((','.join(f'"{column}"' for column in synth_columns + [weight_col]) + '\n').encode())
+            for part in parts:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out, 1 << 24)
+                os.remove(part)
+        os.replace(tmp, path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return path
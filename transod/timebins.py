@@ -0,0 +1,70 @@
+# Auteur : Rémy Wilson
+# Programme : Découpage vectorisé des heures de départ (HHMM) en périodes, heures et intervalles.
+# Date: 18 Octobre 2026
+
+import numpy as np
+import pandas as pd
+
+from transod.codes import dense_index
+
+time_periods = {
+    'Matin pointe': (600, 900),
+    'Jour': (900, 1600),
+    'PM pointe': (1600, 1900),
+    'Soir': (1900, 2800)
+}
+
+
+def _hhmm_minutes(hhmm):
+    return (hhmm // 100) * 60 + hhmm % 100
+
+
+def hhmm_to_minutes(values):
+    # The survey day runs from 00:00 to 29:59; 2400-2959 are the small hours of the
+    # next day and map to 1440-1799 minutes. Invalid times give -1.
+    hhmm = dense_index(values, 3000)
+    valid = (hhmm >= 0) & (hhmm % 100 < 60)
+    return np.where(valid, _hhmm_minutes(hhmm), -1)
+
+
+def compile_periods(periods=None):
+    periods = periods or time_periods
+    labels = list(periods)
+    bounds = np.array([[_hhmm_minutes(a), _hhmm_minutes(b)] for a, b in periods.values()])
+    if (bounds[:, 0] >= bounds[:, 1]).any():
+        raise ValueError("Chaque période doit avoir un début inférieur à sa fin")
+
+    edges = np.unique(bounds)
+    # Interval k is [edges[k-1], edges[k]); interval 0 and the last one lie outside every period.
+    interval_codes = np.full(len(edges) + 1, -1, dtype=np.int16)
+    for k in range(1, len(edges)):
+        inside = (bounds[:, 0] <= edges[k - 1]) & (edges[k] <= bounds[:, 1])
+        if inside.any():
+            interval_codes[k] = np.argmax(inside)
+
+    return {'labels': labels, 'edges': edges, 'codes': interval_codes}
+
+
+def period_codes(minutes, compiled=None):
+    compiled = compiled or compile_periods()
+    minutes = np.asarray(minutes)
+    codes = compiled['codes'][np.searchsorted(compiled['edges'], minutes, side='right')]
+    return np.where(minutes >= 0, codes, -1).astype(np.int16)
+
+
+def bin_departures(values, periods=None, bin_minutes=None):
+    compiled = compile_periods(periods)
+    minutes = hhmm_to_minutes(values)
+    valid = minutes >= 0
+    service_hour = np.where(valid, minutes // 60, -1)
+
+    bins = {
+        'valid': valid,
+        'minutes': minutes,
+        'service_hour': service_hour,
+        'hour': np.where(valid, service_hour % 24, -1),
+        'period': pd.Categorical.from_codes(period_codes(minutes, compiled), categories=compiled['labels']),
+    }
+    if bin_minutes:
+        bins['bin'] = np.where(valid, minutes // bin_minutes, -1)
+    return bins
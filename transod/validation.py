@@ -0,0 +1,186 @@
+# Auteur : Rémy Wilson
+# Programme : Validation en une passe des déplacements bruts, avec rapport par règle et par colonne.
+# Date: 18 Octobre 2026
+
+import numpy as np
+import pandas as pd
+
+from transod.codes import membership_mask
+from transod.cube import weight_col
+from transod.filtering import valid_modes, valid_purposes, valid_zones
+from transod.instrument import stage
+from transod.streaming import read_chunks
+from transod.timebins import hhmm_to_minutes
+
+trip_columns = ['originreportzone', 'destreportzone', 'departtime', 'trippurpose', 'modeprimary', weight_col]
+
+# Rules marked 'warn' are reported but do not reject rows: identical records are
+# legitimate in the survey (same trip profile and factor for two respondents).
+validation_rules = {
+    'origin_zone': {'check': 'codes', 'column': 'originreportzone', 'codes': valid_zones},
+    'dest_zone': {'check': 'codes', 'column': 'destreportzone', 'codes': valid_zones},
+    'purpose': {'check': 'codes', 'column': 'trippurpose', 'codes': valid_purposes},
+    'mode': {'check': 'codes', 'column': 'modeprimary', 'codes': valid_modes},
+    'departtime': {'check': 'hhmm', 'column': 'departtime'},
+    'tripfactor': {'check': 'positive', 'column': weight_col},
+    'duplicate': {'check': 'duplicate', 'columns': trip_columns, 'warn': True},
+}
+
+max_reported_values = 10
+
+
+def _codes(values, rule):
+    return membership_mask(values, rule['codes'])
+
+
+def _hhmm(values, rule):
+    return hhmm_to_minutes(values) >= 0
+
+
+def _positive(values, rule):
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+    return np.isfinite(values) & (values > 0)
+
+
+checks = {
+    'codes': _codes,
+    'hhmm': _hhmm,
+    'positive': _positive,
+}
+
+
+def _columns(rule):
+    return rule.get('columns') or [rule['column']]
+
+
+def _row_hashes(df, columns):
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def _repeated(hashes):
+    # True for every row whose content already appeared earlier.
+    _, first = np.unique(hashes, return_index=True)
+    repeated = np.ones(len(hashes), dtype=bool)
+    repeated[first] = False
+    return repeated
+
+
+def _value_counts(values):
+    values = pd.Series(values)
+    counts = values.value_counts(dropna=False)
+    return {(None if pd.isna(value) else value.item() if hasattr(value, 'item') else value): int(count)
+            for value, count in counts.items()}
+
+
+def _empty_report(rules):
+    return {
+        'rows_in': 0,
+        'rows_out': 0,
+        'rules': {name: {'columns': _columns(rule), 'severity': 'warn' if rule.get('warn') else 'reject',
+                         'failed': 0, 'values': {}}
+                  for name, rule in rules.items()},
+        'columns': {},
+    }
+
+
+def _check_chunk(df, rules, report):
+    # Evaluates every rule on one chunk and adds its counts to `report`; returns the
+    # keep mask (reject rules only). Duplicates need the whole file: see _finish.
+    missing = [column for rule in rules.values() for column in _columns(rule) if column not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes absentes: {', '.join(dict.fromkeys(missing))}")
+
+    keep = np.ones(len(df), dtype=bool)
+    rejected_by_column = {}
+    for name, rule in rules.items():
+        if rule['check'] == 'duplicate':
+            continue
+        values = df[rule['column']].to_numpy()
+        ok = checks[rule['check']](values, rule)
+        entry = report['rules'][name]
+        entry['failed'] += int((~ok).sum())
+        for value, count in _value_counts(values[~ok]).items():
+            entry['values'][value] = entry['values'].get(value, 0) + count
+
+        if not rule.get('warn'):
+            keep &= ok
+            column_ok = rejected_by_column.get(rule['column'], np.ones(len(df), dtype=bool))
+            rejected_by_column[rule['column']] = column_ok & ok
+
+    for column in dict.fromkeys(column for rule in rules.values() for column in _columns(rule)):
+        entry = report['columns'].setdefault(column, {'missing': 0, 'rejected': 0})
+        entry['missing'] += int(df[column].isna().sum())
+        if column in rejected_by_column:
+            entry['rejected'] += int((~rejected_by_column[column]).sum())
+
+    report['rows_in'] += len(df)
+    return keep
+
+
+def _finish(keep, hashes, rules, report):
+    for name, rule in rules.items():
+        if rule['check'] != 'duplicate':
+            continue
+        repeated = _repeated(hashes[name])
+        report['rules'][name]['failed'] = int(repeated.sum())
+        if not rule.get('warn'):
+            keep &= ~repeated
+
+    for entry in report['rules'].values():
+        top = sorted(entry['values'].items(), key=lambda item: -item[1])[:max_reported_values]
+        entry['values'] = dict(top)
+    report['rows_out'] = int(keep.sum())
+    return keep, report
+
+
+def validate_frame(df, rules=None):
+    rules = rules or validation_rules
+    with stage('validate_frame', rows_in=len(df)) as record:
+        report = _empty_report(rules)
+        keep = _check_chunk(df, rules, report)
+        hashes = {name: _row_hashes(df, rule['columns'])
+                  for name, rule in rules.items() if rule['check'] == 'duplicate'}
+        keep, report = _finish(keep, hashes, rules, report)
+        record['rows_out'] = report['rows_out']
+        return keep, report
+
+
+def validate_csv(path, rules=None, chunksize=1_000_000, mask_path=None):
+    # One scan of the file: the chunks are checked as they are read and only the
+    # keep mask (1 byte per row) and, for duplicates, a 64-bit hash per row are kept.
+    rules = rules or validation_rules
+    with stage('validate_csv', source=path) as record:
+        report = _empty_report(rules)
+        masks = []
+        hashes = {name: [] for name, rule in rules.items() if rule['check'] == 'duplicate'}
+        for chunk in read_chunks(path, chunksize):
+            masks.append(_check_chunk(chunk, rules, report))
+            for name in hashes:
+                hashes[name].append(_row_hashes(chunk, rules[name]['columns']))
+
+        keep = np.concatenate(masks) if masks else np.ones(0, dtype=bool)
+        hashes = {name: np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint64)
+                  for name, parts in hashes.items()}
+        keep, report = _finish(keep, hashes, rules, report)
+        if mask_path:
+            np.save(mask_path, keep)
+        record.update(rows_in=report['rows_in'], rows_out=report['rows_out'])
+        return keep, report
+
+
+def print_validation_report(report):
+    print(f"Lignes lues: {report['rows_in']}")
+    print(f"Lignes valides: {report['rows_out']}")
+    print(f"Lignes rejetées: {report['rows_in'] - report['rows_out']}")
+
+    print("\nPar règle:")
+    for name, entry in report['rules'].items():
+        flag = ' (avertissement)' if entry['severity'] == 'warn' else ''
+        print(f"  {name:<12} {', '.join(entry['columns'])[:40]:<40} {entry['failed']:>10}{flag}")
+        if entry['values']:
+            values = ', '.join(f'{value}: {count}' for value, count in entry['values'].items())
+            print(f"  {'':<12} valeurs: {values}")
+
+    print("\nPar colonne:")
+    for column, entry in report['columns'].items():
+        print(f"  {column:<20} manquantes {entry['missing']:>10}  rejetées {entry['rejected']:>10}")
@@ -0,0 +1,81 @@
+# Auteur : Rémy Wilson
+# Programme : Table des caractéristiques par zone (parts modales, totaux, distance, secteur) en une agrégation.
+# Date: 18 Octobre 2026
+
+import numpy as np
+import pandas as pd
+
+from transod.categories import compile_mapping, lookup_categorical, lookup_codes, mode_categories, sector_lookup, zones_dict
+from transod.cube import as_cube, rollup
+from transod.distance import default_distances, distances_from
+from transod.instrument import traced
+
+centre_ville_zone = 1
+
+share_columns = {
+    'Auto': 'Part_Auto',
+    'Transport en commun': 'Part_TC',
+    'Modes actifs': 'Part_Actifs',
+    'Autres': 'Part_Autres',
+}
+
+_category_lookup = compile_mapping(mode_categories)
+
+
+def _report_zone_table(data, side, weights):
+    cube = as_cube(data, [side, 'mode'], weights=weights)
+    cube = rollup(cube, 'mode', mode_categories, name='mode_category')
+    return np.asarray(cube['labels'][side]), cube['counts']
+
+
+def _column_zone_table(data, zone_col, weights):
+    # Any integer zone column (traffic zones, municipalities, ...): zones are the
+    # distinct values present, trips with an unmapped mode are left out.
+    modes = lookup_codes(_category_lookup, data['modeprimary'])
+    keep = modes >= 0
+    zones, zone_index = np.unique(data[zone_col].to_numpy()[keep], return_inverse=True)
+
+    n_modes = len(_category_lookup['labels'])
+    cells = zone_index * n_modes + modes[keep]
+    values = None
+    if weights is not None:
+        values = data[weights] if isinstance(weights, str) else weights
+        values = np.asarray(values, dtype=np.float64)[keep]
+
+    counts = np.bincount(cells, weights=values, minlength=len(zones) * n_modes)
+    return zones, counts.reshape(len(zones), n_modes)
+
+
+@traced('zone_features')
+def zone_features(data, side='origin', zone_col=None, weights=None, centre=centre_ville_zone,
+                  distances=None, sectors=None, names=None):
+    # side selects the report zone of the trip end ('origin' or 'dest'); zone_col
+    # replaces it with another zone column of the trip table. The report-zone names,
+    # sectors and coordinates do not apply to other zone systems: with zone_col, the
+    # columns they feed are left empty unless names, sectors and distances are given.
+    if zone_col is None:
+        zones, table = _report_zone_table(data, side, weights)
+        names = zones_dict if names is None else names
+        sectors = sectors or sector_lookup
+        distances = distances or default_distances()
+    else:
+        zones, table = _column_zone_table(data, zone_col, weights)
+
+    totals = table.sum(axis=1)
+    present = totals > 0
+    zones, table, totals = zones[present], table[present], totals[present]
+    shares = table / totals[:, None] * 100
+
+    features = {
+        'Zone_ID': zones,
+        'Zone_Nom': [names.get(zone, str(zone)) for zone in zones.tolist()] if names is not None else [None] * len(zones),
+        'Secteur': (np.asarray(lookup_categorical(sectors, zones), dtype=object) if sectors is not None
+                    else np.full(len(zones), None, dtype=object)),
+        'Distance_km': (distances_from(centre, zones, distances) if distances is not None
+                        else np.full(len(zones), np.nan)),
+    }
+    for i, label in enumerate(mode_categories):
+        features[share_columns.get(label, f'Part_{label}')] = shares[:, i]
+    features['Total_Deplacements'] = totals
+
+    return pd.DataFrame(features)